@@ -0,0 +1,158 @@
+import argparse
+import json
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+from bosses import createBoss
+from simulation import complete_batch, complete_events
+
+# Times every stage of computing a boss: building the transition matrix of each loot table, propagating the cdf
+# and both monte carlo simulations. Every run is appended to a json lines history file
+# so a run can be compared against an earlier one to spot regressions.
+representativeBosses = [
+    'mimic',
+    'zulrah',
+    'vorkath',
+    'corporeal_beast',
+    'general_graardor',
+    'Dagannoth Kings',
+    'gauntlet',
+    'nex',
+    'theatre_of_blood',
+    'chambers_of_xeric',
+    'Cerberus + 3 smouldering',
+    'Corrupted gauntlet, 2 enhanced weapon seeds, 6 armour crystals',
+]
+historyFile = 'benchmarks.jsonl'
+
+
+def measure(function, repeat=1):
+    # best wall time of a few runs, then a separate traced run for the peak memory since tracing slows things down
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmarkBoss(name, group_size, samples=10000, repeat=1):
+    boss = createBoss(name)
+    boss.set_groupsize(group_size)
+    model = boss.model()
+    layout = boss.stateLayout()
+    results = []
+
+    def record(stage, seconds, peak, nnz=None, kc=None):
+        results.append({'boss': name, 'group_size': group_size, 'stage': stage, 'states': boss.nStates, 'nnz': nnz, 'kc': kc, 'seconds': seconds, 'peak_bytes': peak})
+
+    # the matrices only get built for chains small enough to materialize, bigger ones are applied matrix free
+    if(boss.estimateChain(layout).memory['sparse'] <= boss.maxMemory):
+        factors, seconds, peak = measure(lambda: boss.constructTransitionMatrices(layout), repeat)
+        record('construct', seconds, peak, nnz=sum(factor.nnz for factor in factors))
+
+    boss.convertToMarkovChain()
+    nnz = sum(matrix.nnz for matrix in boss.transitionMatrices) if boss.transitionMatrices else None
+    y, seconds, peak = measure(boss.propagateCdf, repeat)
+    record('propagate', seconds, peak, nnz=nnz, kc=len(y))
+
+    rng = np.random.default_rng(0)
+    kc, seconds, peak = measure(lambda: complete_batch(model, samples, rng), repeat)
+    record('montecarlo', seconds, peak, kc=int(kc.max()))
+    kc, seconds, peak = measure(lambda: complete_events(model, samples, rng), repeat)
+    record('events', seconds, peak, kc=int(kc.max()))
+    return results
+
+
+def currentLabel():
+    # the commit we're benchmarking, or the time when that's not available
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def readHistory(filename):
+    try:
+        with open(filename) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def appendHistory(filename, results):
+    with open(filename, 'a') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+
+
+def compare(results, baseline, tolerance=0.2, minimumSeconds=0.01, minimumBytes=1024 ** 2):
+    # flags every stage that got slower or used more memory than the baseline by more than the tolerance,
+    # stages that take less than minimumSeconds or minimumBytes are too noisy to compare
+    reference = {(r['boss'], r['group_size'], r['stage']): r for r in baseline}
+    regressions = []
+    for result in results:
+        key = (result['boss'], result['group_size'], result['stage'])
+        if(key not in reference):
+            continue
+        old = reference[key]
+        if(result['seconds'] > old['seconds'] * (1 + tolerance) and result['seconds'] > minimumSeconds):
+            regressions += [(key, 'seconds', old['seconds'], result['seconds'])]
+        if(result['peak_bytes'] > old['peak_bytes'] * (1 + tolerance) and result['peak_bytes'] > minimumBytes):
+            regressions += [(key, 'peak_bytes', old['peak_bytes'], result['peak_bytes'])]
+    return regressions
+
+
+def printResults(results):
+    print(f"{'boss':<40} {'gs':>2} {'stage':<10} {'states':>9} {'nnz':>10} {'kc':>8} {'seconds':>9} {'peak MB':>9}")
+    for r in results:
+        nnz = '' if r['nnz'] is None else r['nnz']
+        kc = '' if r['kc'] is None else r['kc']
+        print(f"{r['boss'][:40]:<40} {r['group_size']:>2} {r['stage']:<10} {r['states']:>9} {nnz:>10} {kc:>8} {r['seconds']:>9.4f} {r['peak_bytes'] / 1024 ** 2:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks every stage of computing a set of bosses.')
+    parser.add_argument('bosses', nargs='*', default=representativeBosses, help='names of the bosses to benchmark')
+    parser.add_argument('-g', '--group-sizes', nargs='+', type=int, default=[1, 2])
+    parser.add_argument('-n', '--samples', type=int, default=10000, help='players to simulate in the monte carlo stage')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='runs to take the best time of')
+    parser.add_argument('--history', default=historyFile, help='json lines file the results get appended to')
+    parser.add_argument('--label', default=None, help='name of this run in the history, the current commit by default')
+    parser.add_argument('--baseline', default=None, help='label of an earlier run in the history to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative slowdown that counts as a regression')
+    arguments = parser.parse_args(argv)
+
+    label = arguments.label or currentLabel()
+    results = []
+    for group_size in arguments.group_sizes:
+        for name in arguments.bosses:
+            results += benchmarkBoss(name, group_size, arguments.samples, arguments.repeat)
+    for result in results:
+        result['label'] = label
+    printResults(results)
+
+    regressions = []
+    if(arguments.baseline is not None):
+        baseline = [r for r in readHistory(arguments.history) if r.get('label') == arguments.baseline]
+        if(not baseline):
+            raise SystemExit(f"no results labeled {arguments.baseline} in {arguments.history}")
+        regressions = compare(results, baseline, arguments.tolerance)
+        for (boss, group_size, stage), metric, old, new in regressions:
+            print(f"REGRESSION {boss} group size {group_size} {stage}: {metric} {old:.4g} -> {new:.4g}")
+        print(f"{len(regressions)} regressions against {arguments.baseline}")
+
+    appendHistory(arguments.history, results)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,10 +1,15 @@
 import functools
 from operator import mul
 from functools import reduce
-import random
 import math
-from scipy.sparse import coo_matrix
+from scipy.sparse import coo_matrix, identity
+from scipy.sparse.linalg import spsolve_triangular
 import numpy as np
+from markov import ChainEstimate, CouponCollector, MatrixFreeOperator, OddsSweep, PhaseType, StateLayout
+from model import LootModel
+from simulation import complete_events
+from parallel import ParallelPropagator
+from instrumentation import phase
 
 class monster:
     loot_odds = {}
@@ -12,9 +17,44 @@ class monster:
     tertiary_odds = {}
     quaternary_odds = {}
     kc_name = 'kc'
+    # memory computing the chain of a boss may take, chains that don't fit are simulated instead
+    maxMemory = 2 * 1024 ** 3
+    # element operations an exact engine may take before simulating is the better deal, an hour or so
+    maxWork = 1e12
+    # players to simulate when the chain can't be computed exactly
+    monteCarloSamples = 100000
+    # chains up to this many states try multiplying their tables together, a single mat-vec per kc can beat one per table
+    composeStates = 4096
+    # chains up to this many states answer quantiles from powers of their (dense) transition matrix, bigger ones propagate
+    powerStates = 1024
+    # float32 halves the memory traffic of propagating big chains, its state gets renormalized in float64 every so often
+    propagationDtype = 'float64'
+    renormalizeEvery = 64
+    # math on subnormal numbers is many times slower, in float32 mass this small is flushed to zero every kc.
+    # float64 only flushes the subnormals themselves every renormalizeEvery kc, clues make lots of them
+    flushBelow = 1e-30
+    # ways to compute the chain, auto picks one from the estimated size and cost of the chain
+    engines = ('auto', 'analytic', 'sparse', 'matrix-free', 'monte-carlo', 'spectral')
 
     def __init__(self, loot_tables=None, loot_amount=None, name=None):
-        self.absorbingMatrix = None
+        # the transition matrix of every loot table in the order they're rolled, a kill applies them one after another
+        self.transitionMatrices = []
+        self.transitionOperator = None
+        self.couponCollector = None
+        self.phaseType = None
+        # the transition matrix of 2^j kills for every j, kept for later quantile queries
+        self.transitionPowers = []
+        # processes to split the propagation of a single large chain over
+        self.workers = 1
+        self.engine = 'auto'
+        # generator for the rolls of complete(), seed it (or give every process its own) to reproduce a simulation
+        self.rng = np.random.default_rng()
+        self.chosenEngine = None
+        self.engineReason = None
+        # bound on the error of the cdf and the largest drift of the probability mass seen when propagating in float32
+        self.propagationError = None
+        # the loot compiled into arrays, built when it's first needed
+        self._model = None
         
         self.group_size = 1
         self._name = name if name else self.__class__.__name__
@@ -48,20 +88,57 @@ class monster:
         self.loot_amount = self._loot_amount.copy()
         for item, amount in self.loot_amount.items():
             self.loot_amount[item] = self.group_size * amount
+        self._model = None
+        self.clearChain()
         self.setNstates()
 
+    def clearChain(self):
+        # forgets the chain and everything worked out from it, a new group size needs a new chain
+        self.transitionMatrices = []
+        self.transitionOperator = None
+        self.couponCollector = None
+        self.phaseType = None
+        self.transitionPowers = []
+        self.chosenEngine = None
+        self.engineReason = None
+        self.propagationError = None
+
     def setNstates(self):
         # merge items with the same odds
-        try:
-            self.nStates = functools.reduce(mul, [amount + 1 for amount in self.loot_amount.values() if amount > 0])
-        except Exception as e:
-            self.nStates = 0
-
+        self.nStates = self.stateLayout().nStates if len(self.model().items) else 0
+
+    def model(self):
+        # every engine works from this instead of the dicts, so the items only get put in order once per group size
+        if(self._model is None):
+            items = [item for item, amount in self.loot_amount.items() if amount > 0]
+            odds = [[table.get(item, 0) for item in items] for table in self.lootTables()]
+            self._model = LootModel(self.name, self.kc_name, self.group_size, items, odds, [self.loot_amount[item] for item in items])
+        return self._model
+
+
+    @property
+    def absorbingMatrix(self):
+        # The transition matrix of a whole kill. Multiplying the tables together fills in a lot more nonzeros than the
+        # tables have combined, so the product is only made when something needs the matrix itself.
+        if(not self.transitionMatrices):
+            return None
+        return reduce(lambda a, b: a @ b, self.transitionMatrices)
+
+    @absorbingMatrix.setter
+    def absorbingMatrix(self, matrix):
+        # bosses that build their whole chain as one matrix
+        self.transitionMatrices = [] if matrix is None else [matrix]
+        self.transitionPowers = []
+        self.phaseType = None
+
+    def lootTables(self):
+        # every kill rolls each non empty loot table once
+        return [table for table in (self.loot_odds, self.secondary_odds, self.tertiary_odds, self.quaternary_odds) if len(table.keys())]
 
     def roll_loot(self, table=None):
         if(not table):
             table = self.loot_odds
-        roll = random.random()
+        roll = self.rng.random()
         for item, odds in table.items():
             if(roll <= odds):
                 return [item]
@@ -95,130 +172,345 @@ class monster:
         
         return self.kc, self.loot_gotten
 
-    # we can see state of the drops as an the index to an n dimensional array, so we can use traditional array indexing to calculate the index for the transition matrix and back
-    def indexToState(self, index, drops):
-        shape = [d + 1 for d in drops.values()]
-        state = []
-        for dimSize in shape:
-            state.append(index % dimSize)
-            index //= dimSize
-        return state
-
-
-    def stateToIndex(self, state, drops):
-        shape = [d + 1 for d in drops.values()]
-        index = 0
-        size = 1
-        for dimSize, dim in zip(shape, state):
-            index += size * dim
-            size *= dimSize
-
-        return index
-
-    def contructMatrix(self, nStates, odds, drops):
+    # we can see state of the drops as an the index to an n dimensional array, so we can use traditional array indexing to calculate the index for the transition matrix and back.
+    # A state has the local state of every group of interchangeable items of the layout (ItemGroup), the first group changes fastest
+    def indexToState(self, index, layout=None):
+        layout = layout if layout is not None else self.stateLayout()
+        return [int(local) for local in (index // layout.strides) % np.array(layout.shape, dtype='int')]
+
+    def stateToIndex(self, state, layout=None):
+        layout = layout if layout is not None else self.stateLayout()
+        return int(np.dot(state, layout.strides))
+
+    def stateLayout(self):
+        # items that are interchangeable on every loot table get lumped together into a single dimension
+        model = self.model()
+        return StateLayout(model.odds, model.targets)
+
+    def contructMatrix(self, nStates, odds, layout=None):
+        # odds is a row of the LootModel's odds, the layout only depends on the drops so it can be shared between all loot tables
+        layout = layout if layout is not None else StateLayout(odds[None, :], self.model().targets)
+        index = np.arange(nStates)
+        rowTotal = np.zeros(nStates)
         data = []
         rowIndex = []
         colIndex = []
 
-        for i in range(0,nStates):
-            rowTotal = 0
-            for itemIndex, item in enumerate(drops.keys()):
-                # skip if the item is not on this loottable
-
-                if(not item in odds):
-                    continue
-                
-                state = self.indexToState(i, drops)
-                # if we already enough of this items skip it
-                if(state[itemIndex] >= drops[item]):
-                    continue
-
-                state[itemIndex] += 1
-                j = self.stateToIndex(state, drops)
-
-                rowTotal += odds[item]
-                data += [odds[item]]
-                rowIndex += [i]
-                colIndex += [j]
-
-            # add the diagonal
-            data += [1-rowTotal]
-            rowIndex += [i]
-            colIndex += [i]
-        
-        data = np.array(data)
-        rowIndex = np.array(rowIndex, dtype='int')
-        colIndex = np.array(colIndex, dtype='int')
+        for groupIndex, group in enumerate(layout.groups):
+            # skip if the items are not on this loottable
+            if(odds[group.items[0]] <= 0):
+                continue
+
+            rows, cols, multiplicity, missing = layout.transitions(groupIndex)
+            rowTotal += odds[group.items[0]] * missing
+            data += [odds[group.items[0]] * multiplicity]
+            rowIndex += [rows]
+            colIndex += [cols]
+
+        # add the diagonal
+        data += [1 - rowTotal]
+        rowIndex += [index]
+        colIndex += [index]
+
+        data = np.concatenate(data)
+        rowIndex = np.concatenate(rowIndex)
+        colIndex = np.concatenate(colIndex)
         return coo_matrix((data, (rowIndex, colIndex)), shape=(nStates,nStates)).tocsr()
         
 
     def convertToMarkovChain(self):
-        
-        # list all the items we need to get
-        try:
-            drops = {item: amount for item, amount in self.loot_amount.items() if amount > 0}
-        except:
-            print(self.loot_amount.items())
-            return
-
-        # number of states in matrix * double size / 2 (because the resulting matrix is triangular)
-        memUsage = ((self.nStates ** 2 * 64 / 2)/ (1024**2))
-        print(f"{self.name} states: {self.nStates}, approx matrix memory usage: {memUsage} MB")
-        if(self.nStates > 4096):
-            return False
-
-        # generate tables for all loot tables
-        m1 = self.contructMatrix(self.nStates, self.loot_odds, drops)
-        self.absorbingMatrix = m1
-        if(len(self.secondary_odds.keys())):
-            m2 = self.contructMatrix(self.nStates, self.secondary_odds, drops)
-            self.absorbingMatrix *= m2
-        if(len(self.tertiary_odds.keys())):
-            m3 = self.contructMatrix(self.nStates, self.tertiary_odds, drops)
-            self.absorbingMatrix *= m3
-        if(len(self.quaternary_odds.keys())):
-            m4 = self.contructMatrix(self.nStates, self.quaternary_odds, drops)
-            self.absorbingMatrix *= m4
-        
+        model = self.model()
+        self.clearChain()
+        layout = self.stateLayout()
+        estimate = self.estimateChain(layout)
+        self.chosenEngine, self.engineReason = self.chooseEngine(estimate)
+        print(f"{self.name} states: {self.nStates}, nnz: ~{sum(estimate.tableNnz)}, kc: ~{estimate.length}, engine: {self.chosenEngine} ({self.engineReason})")
+
+        if(self.chosenEngine == 'analytic'):
+            if(not self.isCouponCollector()):
+                raise ValueError(f"{self.name} can't use the analytic engine, it only handles one of each item from a single loot table")
+            # one of each item from a single table has a closed form, no matrix needed
+            self.couponCollector = CouponCollector([(model.odds[0, items[0]], len(items)) for items, _ in layout.members])
+        elif(self.chosenEngine == 'matrix-free'):
+            self.transitionOperator = MatrixFreeOperator(model.odds, layout, self.propagationDtype)
+        elif(self.chosenEngine == 'sparse'):
+            self.transitionMatrices = self.constructTransitionMatrices(layout)
+            if(len(self.transitionMatrices) > 1 and self.nStates <= self.composeStates):
+                # every mat-vec has a fixed cost on top of its nonzeros, which is most of the work for small chains
+                product = self.absorbingMatrix
+                if(product.nnz + ChainEstimate.matvecOverhead <= sum(matrix.nnz + ChainEstimate.matvecOverhead for matrix in self.transitionMatrices)):
+                    self.transitionMatrices = [product.tocsr()]
+        elif(self.chosenEngine == 'spectral'):
+            # the cdf as a sum of geometric terms, the tables are kept to propagate with when that's too ill-conditioned
+            self.transitionMatrices = self.constructTransitionMatrices(layout)
+            self.phaseType = PhaseType(self.absorbingMatrix)
+        # monte-carlo doesn't need anything up front, the players get simulated when the cdf is asked for
         return True
 
-    def getAbsorbingMatrixGraph(self):
+    def estimateChain(self, layout=None):
+        model = self.model()
+        layout = self.stateLayout() if layout is None else layout
+        return ChainEstimate(model.odds, layout, model.targets, samples=self.monteCarloSamples)
+
+    def chooseEngine(self, estimate):
+        # returns the engine to compute the chain with and why
+        if(self.engine != 'auto'):
+            return self.engine, 'asked for'
+        if(self.isCouponCollector()):
+            return 'analytic', 'one of each item from a single loot table has a closed form'
+
+        megabytes = {engine: memory / 1024 ** 2 for engine, memory in estimate.memory.items()}
+        # a sparse mat-vec beats the matrix free operator whenever the matrices fit
+        if(estimate.memory['sparse'] <= self.maxMemory and estimate.work['sparse'] <= self.maxWork):
+            return 'sparse', f"the matrices take about {megabytes['sparse']:.1f} MB"
+        if(estimate.memory['matrix-free'] <= self.maxMemory and estimate.work['matrix-free'] <= self.maxWork):
+            return 'matrix-free', f"the matrices would take about {megabytes['sparse']:.0f} MB, the state vectors only {megabytes['matrix-free']:.0f} MB"
+        return 'monte-carlo', f"exact engines need at least {min(megabytes['sparse'], megabytes['matrix-free']):.0f} MB and {min(estimate.work['sparse'], estimate.work['matrix-free']):.2g} operations"
+
+    def isCouponCollector(self):
+        model = self.model()
+        return len(model.items) > 0 and len(model.odds) == 1 and bool((model.targets == 1).all())
+
+    def constructTransitionMatrices(self, layout):
+        # generate tables for all loot tables
+        return [self.contructMatrix(layout.nStates, odds, layout) for odds in self.model().odds]
+
+    def expectedCompletion(self):
+        # Exact mean and variance of the completion kc, from the fundamental matrix N = (I - Q)^-1 of the transient states Q.
+        # Drops only ever move us to a higher state so I - Q is upper triangular and N can be applied by back substitution,
+        # no need to run the cdf all the way to the cutoff. Solves the chain of the boss (barrows builds its own),
+        # the triangular solve needs the tables multiplied together
+        self.ensureChain()
+        if(self.chosenEngine == 'monte-carlo'):
+            raise ValueError(f"{self.name} has too many states to solve exactly")
+        # engines without matrices (the closed form, matrix free) get them built just for the solve, they aren't kept
+        matrices = self.transitionMatrices or self.constructTransitionMatrices(self.stateLayout())
+        matrix = reduce(lambda a, b: a @ b, matrices).tocsr()
+
+        (width, _) = matrix.shape
+        if(width < 2):
+            return 0.0, 0.0
+
+        transient = (identity(width - 1) - matrix[:-1, :-1]).tocsr()
+        # expected kc to finish from every state, t = N 1
+        expected = spsolve_triangular(transient, np.ones(width - 1), lower=False)
+        # var = (2N - I) t - t^2
+        second = spsolve_triangular(transient, expected, lower=False)
+        variance = 2 * second - expected - expected ** 2
+
+        return float(expected[0]), float(variance[0])
+
+    def quantiles(self, qs):
+        # The lowest kc at which at least q of the players have completed, for every q. Instead of propagating the cdf
+        # one kc at a time the answer is bracketed by squaring the transition matrix and then found by binary lifting,
+        # about 2 log2(kc) matrix products. The powers are kept so later queries only need the products with the state.
+        if(not all(0 < q < 1 for q in qs)):
+            raise ValueError(f"quantiles have to be between 0 and 1, got {qs}")
+        self.ensureChain()
+        if(self.couponCollector is not None):
+            return [self.bisectCdf(self.couponCollector.cdf, q) for q in qs]
+        if(self.transitionMatrices and self.transitionMatrices[0].shape[0] <= self.powerStates):
+            return [self.liftQuantile(q) for q in qs]
+
+        # too big to square, (or matrix free, or simulated) so the cdf gets propagated up to the highest quantile
+        y = self.propagateCdf(threshold=max(qs))
+        return [int(np.argmax(y >= q)) + 1 for q in qs]
+
+    def ensureChain(self):
+        # picks an engine and builds the chain like computing the graph does, unless that already happened
+        # (barrows builds its matrix without picking an engine)
+        if(self.chosenEngine is None and not self.transitionMatrices):
+            self.convertToMarkovChain()
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def bisectCdf(self, cdf, q):
+        # for a cdf with a closed form, double the kc until it's reached and bisect between the last two
+        high = 1
+        while(cdf([high])[0] < q):
+            high *= 2
+        low = high // 2
+        while(high - low > 1):
+            middle = (low + high) // 2
+            if(cdf([middle])[0] >= q):
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def liftQuantile(self, q):
+        powers = self.transitionPowers
+        if(not powers):
+            powers += [self.absorbingMatrix.toarray()]
+        # the first row of the matrix of 2^j kills ends in the cdf at kc 2^j, square until that reaches q
+        while(powers[-1][0, -1] < q):
+            if(len(powers) >= 63):
+                raise ValueError(f"{self.name} doesn't reach {q} in 2^62 {self.kc_name}")
+            powers += [powers[-1] @ powers[-1]]
+
+        # the highest kc that hasn't reached q yet, built up from the largest power down
+        state = np.zeros(len(powers[0]))
+        state[0] = 1
+        kc = 0
+        for j in reversed(range(len(powers))):
+            candidate = state @ powers[j]
+            if(candidate[-1] < q):
+                state = candidate
+                kc += 2 ** j
+        return kc + 1
+
+    def transitionFactors(self):
+        # the transposed transition matrices that get applied every kc, in the order the tables are rolled
+        if(self.transitionMatrices):
+            return [matrix.T for matrix in self.transitionMatrices]
+        return [matrix.T for matrix in self.constructTransitionMatrices(self.stateLayout())]
+
+    def cdfAt(self, kc):
+        # The chance to have completed at every given kc, straight from the closed form or the phase type of the chain
+        # when it has one, so kc far out don't need the kc before them. Chains too ill-conditioned for that propagate.
+        kc = np.asarray(kc, dtype='int')
+        self.ensureChain()
+        if(self.couponCollector is not None):
+            return self.couponCollector.cdf(kc)
+        if(self.phaseType is None and self.transitionMatrices and self.transitionMatrices[0].shape[0] <= self.composeStates):
+            try:
+                self.phaseType = PhaseType(self.absorbingMatrix)
+            except ValueError:
+                pass
+        if(self.phaseType is not None):
+            y, error = self.phaseType.evaluate(kc)
+            if(error.max(initial=0) <= PhaseType.tolerance):
+                return y
+
+        # further than it gets to the threshold the cdf is within the tolerance of 1 anyway
+        y = self.propagateCdf(threshold=1 - PhaseType.tolerance, length=int(kc.max(initial=1)))
+        return np.where(kc > 0, y[np.clip(kc, 1, len(y)) - 1], 0)
+
+    def propagateCdf(self, threshold=0.99999, length=None):
+        # instead of taking powers of the whole matrix only carry the probability of being in each state after a kc,
+        # which is a single mat-vec per kc. The chance to have completed at a kc is the mass in the final state.
+        if(self.couponCollector is not None):
+            return self.couponCollector.propagateCdf(threshold)
+
+        if(self.phaseType is not None and self.chosenEngine == 'spectral'):
+            y = self.phaseType.propagateCdf(threshold)
+            if(y is not None):
+                return y
+            print(f"{self.name} phase type is too ill-conditioned, propagating instead")
+
+        if(self.chosenEngine == 'monte-carlo'):
+            return self.simulateCdf(threshold)
+
+        dtype = np.dtype(self.propagationDtype)
+        self.propagationError = None
+        # the matrix free operator has no rows to split over processes, those chains always propagate here
+        if(self.workers > 1 and self.transitionOperator is None):
+            factors = self.transitionFactors()
+            # float32 gets renormalized like below, float64 has no need for it
+            propagator = ParallelPropagator(factors, self.workers, dtype, self.renormalizeEvery if dtype != np.float64 else 0)
+            y = propagator.propagateCdf(threshold)
+            if(dtype != np.float64):
+                operations = [int(np.diff(factor.tocsr().indptr).max()) for factor in factors]
+                self.propagationError = (len(y) * self.roundingPerKc(dtype, operations), propagator.drift)
+            return y
+
+        if(self.transitionOperator is not None):
+            if(self.transitionOperator.dtype != dtype):
+                # the precision changed after the chain was built
+                self.transitionOperator = MatrixFreeOperator(self.model().odds, self.stateLayout(), dtype)
+            step = self.transitionOperator
+            width = self.transitionOperator.nStates
+            # every table adds the mass moved by each of its shifts to the state
+            operations = [2 * len(shifts) + 1 for shifts in self.transitionOperator.tables]
+        else:
+            # a row vector times the tables one after another, so the transposed tables in the same order
+            factors = [matrix.T.tocsr().astype(dtype) for matrix in self.transitionMatrices]
+            step = factors[0].dot if len(factors) == 1 else lambda state: reduce(lambda state, factor: factor.dot(state), factors, state)
+            (width, _) = factors[0].shape
+            operations = [int(np.diff(factor.indptr).max()) for factor in factors]
+        state = np.zeros(width, dtype=dtype)
+        state[0] = 1
+
+        reduced = dtype != np.float64
+        # in float32 the little mass that completes every kc would get rounded away when added to a cdf close to 1,
+        # so the completed mass is taken out of the state every kc and summed up in float64 instead
+        completed = 0.0
+        drift = 0.0
+        y = np.empty(1024)
+        kc = 0
+        # stops at the threshold, or after length kc if that's given and comes first
+        while((kc == 0 or y[kc - 1] < threshold) and kc != length):
+            if(kc == len(y)):
+                y = np.concatenate((y, np.empty(len(y))))
+            state = step(state)
+            kc += 1
+            if(reduced):
+                completed += float(state[width - 1])
+                state[width - 1] = 0
+                state[state < self.flushBelow] = 0
+                if(kc % self.renormalizeEvery == 0):
+                    # the chain never loses mass, whatever the rounding (or flushing) lost or added is put back into the transient states
+                    mass = completed + state.sum(dtype='float64')
+                    drift = max(drift, abs(float(mass) - 1))
+                    state = (state.astype('float64') * ((1 - completed) / (mass - completed))).astype(dtype)
+                y[kc - 1] = completed
+            else:
+                if(kc % self.renormalizeEvery == 0):
+                    state[state < np.finfo(dtype).tiny] = 0
+                y[kc - 1] = state[width - 1]
 
+        if(reduced):
+            self.propagationError = (kc * self.roundingPerKc(dtype, operations), drift)
 
-        copy = self.absorbingMatrix.copy()
-        self.absorbingMatrix.shape
-        (width, _) = copy.shape
-        finalState = (0,width - 1)
-        y = [float(copy[finalState])]
+        return y[:kc]
 
-        copy = self.absorbingMatrix.copy()
-        while(copy[finalState] < 0.99999):
-            copy *= self.absorbingMatrix
-            y += [copy[finalState]]
+    def roundingPerKc(self, dtype, operations):
+        # A float sum of m terms is off by at most gamma_m = m u / (1 - m u) relative to the sum of their magnitudes
+        # and a transition matrix never increases the total mass, so every kc adds at most gamma_m to the error
+        # of the state vector (in the 1-norm), m also counts rounding the matrix entries themselves.
+        unit = float(np.finfo(dtype).eps) / 2
+        return sum((m + 1) * unit / (1 - (m + 1) * unit) for m in operations)
 
+    def simulateCdf(self, threshold=0.99999):
+        # the empirical cdf of simulated players, for chains too big to compute exactly
+        kc = complete_events(self.model(), self.monteCarloSamples)
+        y = np.cumsum(np.bincount(kc)[1:]) / len(kc)
+        return y[:int(np.argmax(y >= threshold)) + 1]
 
-        x = [i for i in range(1,len(y)+1)]
+    def getAbsorbingMatrixGraph(self):
+        with phase(self, 'propagate') as fields:
+            y = self.propagateCdf()
+            fields['steps'] = len(y)
+            if(self.propagationError is not None):
+                fields['error_bound'], fields['mass_drift'] = self.propagationError
+                print(f"{self.name} {self.propagationDtype} propagation, cdf error at most {self.propagationError[0]:.2g}, largest mass drift {self.propagationError[1]:.2g}")
+        with phase(self, 'graph'):
+            return self.graphFromCdf(y)
+
+    def graphFromCdf(self, y):
+        x = np.arange(1, len(y) + 1)
 
         # y index is [kc-1] compensate for that
-        half = next(i[0] for i in enumerate(y) if i[1] > 0.5) + 1
+        half = int(np.argmax(y > 0.5)) + 1
 
         # convert to pdf (and percentages)
-        pdf = [(j - y[it-1])*100 for it,j in enumerate(y)]
-        pdf[0] = self.absorbingMatrix[finalState] * 100
+        pdf = np.diff(y, prepend=0) * 100
 
-        average = sum(xi * yi/100 for xi, yi in zip(x,pdf))
-        mode = pdf.index(max(pdf)) + 1
+        average = float(np.sum(x * pdf / 100))
+        mode = int(np.argmax(pdf)) + 1
 
         # limit the size of the graph
         cutoff = 0.999
+        keep = y < cutoff
+        keep[0] = True
 
-        x = [x1 for it, [x1,y1] in enumerate(zip(x,y)) if y1 < cutoff or it == 0]
-        pdf = [pdf for it, [pdf,y1] in enumerate(zip(pdf,y)) if y1 < cutoff or it == 0]
+        x = x[keep]
+        pdf = pdf[keep]
         # convert to percentages here as well
-        y = [y1 * 100 for it, y1 in enumerate(y) if y1 < cutoff or it == 0]
+        y = y[keep] * 100
 
-        
-        closeCutoff = next(i[0] for i in enumerate(y) if i[1] > max(pdf)/100) + 1
+        closeCutoff = int(np.argmax(y > pdf.max() / 100)) + 1
         # remove early nodes if the cutoff isn't close to the start of the graph
         if(closeCutoff > len(y) / 10):
             x = x[closeCutoff:]
@@ -321,11 +613,16 @@ class zalcano(monster):
     contribution_points = 200
     total_points = 1000
 
-    shard_odds = (1 / 1500 + (1 / 750 - 1 / 1500) * contribution_points / total_points)
-    loot_odds = {"crystal tool seed":1/(200 * total_points / contribution_points), "zalcano shard":shard_odds}
     loot_amount = {"crystal tool seed":1, "zalcano shard":1}
     zalcano_shard = {"max_odds":1/750, "min_odds":1/1500}
 
+    def __init__(self, contribution_points=contribution_points, total_points=total_points, **kwargs):
+        shard_odds = (1 / 1500 + (1 / 750 - 1 / 1500) * contribution_points / total_points)
+        self.loot_odds = {"crystal tool seed":1/(200 * total_points / contribution_points), "zalcano shard":shard_odds}
+        super().__init__(**kwargs)
+        self.contribution_points = contribution_points
+        self.total_points = total_points
+
 class wintertodt(monster):
     loot_odds = {"pyromancer outfit":1/150,"bruma torch":1/150,"warm gloves":1/150,"tome of fire":1/1000,"dragon axe":1/10000}
     loot_amount = {"pyromancer outfit":4,"bruma torch":1,"warm gloves":1,"tome of fire":1, "dragon axe":0}
@@ -456,15 +753,15 @@ class nightmare(monster):
     def roll_loot(self):
         team_loot = super().roll_loot() + super().roll_loot(self.secondary_odds)
         
-        if (random.random() < (self.teamsize-5)/100):
+        if (self.rng.random() < (self.teamsize-5)/100):
             team_loot += super().roll_loot()
 
-        if (random.random() < (self.teamsize-5)/100):
+        if (self.rng.random() < (self.teamsize-5)/100):
             super().roll_loot(self.secondary_odds)
 
         loot = []
         for l in team_loot:
-            if(random.random() < 1/self.teamsize):
+            if(self.rng.random() < 1/self.teamsize):
                 loot += [l]
 
         return loot
@@ -516,11 +813,11 @@ class barrows(monster):
         loot = []
         for _ in range(7):
             l = []
-            if(random.random() <= self.equipment_odds):
-                l = random.choice(list(self.loot_odds.keys()))
+            if(self.rng.random() <= self.equipment_odds):
+                l = self.rng.choice(list(self.loot_odds.keys()))
                 #can't get the same item multiple times in the same chest but the odds of getting any item remain the same
                 while l in loot:
-                    l = random.choice(list(self.loot_odds.keys()))
+                    l = self.rng.choice(list(self.loot_odds.keys()))
                 loot += [l]
 
         return loot
@@ -563,77 +860,39 @@ class barrows(monster):
         return odds
 
 
-class easy_clues(monster):
-    # Group items by their rarity this drastically reduces the amount of nodes in our markov chain to around 1.5 million!
-    # Which means that we only need 1,125,000,000,000 doubles worth of memory to hold the transition graph in memory
-    # Contact me if you know someone with a supercomputer that wants to run some unoptimized code on it to find out 
-    # the exact kc it takes to complete easy clues until Jagex updates the loot table again!
-    # Then calculate the odds of getting a new item of the same rarity
-    loot_odds = {"Amulet of magic (t)": 1/360, "Wooden shield (g)": 1/1404, "Black full helm (t)": 1/1404, "Black platebody (t)": 1/1404, "Black platelegs (t)": 1/1404, "Black plateskirt (t)": 1/1404, "Black kiteshield (t)": 1/1404, "Black full helm (g)": 1/1404, "Black platebody (g)": 1/1404, "Black platelegs (g)": 1/1404, "Black plateskirt (g)": 1/1404, "Black kiteshield (g)": 1/1404, "Black shield (h1)": 1/1404, "Black shield (h2)": 1/1404, "Black shield (h3)": 1/1404, "Black shield (h4)": 1/1404, "Black shield (h5)": 1/1404, "Black helm (h1)": 1/1404, "Black helm (h2)": 1/1404, "Black helm (h3)": 1/1404, "Black helm (h4)": 1/1404, "Black helm (h5)": 1/1404, "Black platebody (h1)": 1/1404, "Black platebody (h2)": 1/1404, "Black platebody (h3)": 1/1404, "Black platebody (h4)": 1/1404, "Black platebody (h5)": 1/1404, "Steel full helm (t)": 1/1404, "Steel platebody (t)": 1/1404, "Steel platelegs (t)": 1/1404, "Steel plateskirt (t)": 1/1404, "Steel kiteshield (t)": 1/1404, "Steel full helm (g)": 1/1404, "Steel platebody (g)": 1/1404, "Steel platelegs (g)": 1/1404, "Steel plateskirt (g)": 1/1404, "Steel kiteshield (g)": 1/1404, "Iron full helm (t)": 1/1404, "Iron platebody (t)": 1/1404, "Iron platelegs (t)": 1/1404, "Iron plateskirt (t)": 1/1404, "Iron kiteshield (t)": 1/1404, "Iron full helm (g)": 1/1404, "Iron platebody (g)": 1/1404, "Iron platelegs (g)": 1/1404, "Iron plateskirt (g)": 1/1404, "Iron kiteshield (g)": 1/1404, "Bronze full helm (t)": 1/1404, "Bronze platebody (t)": 1/1404, "Bronze platelegs (t)": 1/1404, "Bronze plateskirt (t)": 1/1404, "Bronze kiteshield (t)": 1/1404, "Bronze full helm (g)": 1/1404, "Bronze platebody (g)": 1/1404, "Bronze platelegs (g)": 1/1404, "Bronze plateskirt (g)": 1/1404, "Bronze kiteshield (g)": 1/1404, "Studded body (g)": 1/1404, "Studded chaps (g)": 1/1404, "Studded body (t)": 1/1404, "Studded chaps (t)": 1/1404, "Leather body (g)": 1/1404, "Leather chaps (g)": 1/1404, "Blue wizard hat (g)": 1/1404, "Blue wizard robe (g)": 1/1404, "Blue skirt (g)": 1/1404, "Blue wizard hat (t)": 1/1404, "Blue wizard robe (t)": 1/1404, "Blue skirt (t)": 1/1404, "Black wizard hat (g)": 1/1404, "Black wizard robe (g)": 1/1404, "Black skirt (g)": 1/1404, "Black wizard hat (t)": 1/1404, "Black wizard robe (t)": 1/1404, "Black skirt (t)": 1/1404, "Saradomin robe top": 1/1404, "Saradomin robe legs": 1/1404, "Guthix robe top": 1/1404, "Guthix robe legs": 1/1404, "Zamorak robe top": 1/1404, "Zamorak robe legs": 1/1404, "Ancient robe top": 1/1404, "Ancient robe legs": 1/1404, "Armadyl robe top": 1/1404, "Armadyl robe legs": 1/1404, "Bandos robe top": 1/1404, "Bandos robe legs": 1/1404, "Bob's red shirt": 1/1404, "Bob's green shirt": 1/1404, "Bob's blue shirt": 1/1404, "Bob's black shirt": 1/1404, "Bob's purple shirt": 1/1404, "Highwayman mask": 1/1404, "Blue beret": 1/1404, "Black beret": 1/1404, "Red beret": 1/1404, "White beret": 1/1404, "A powdered wig": 1/1404, "Beanie": 1/1404, "Imp mask": 1/1404, "Goblin mask": 1/1404, "Sleeping cap": 1/1404, "Flared trousers": 1/1404, "Pantaloons": 1/1404, "Black cane": 1/1404, "Staff of bob the cat": 1/1404, "Amulet of power (t)": 1/1404, "Ham joint": 1/1404, "Rain bow": 1/1404, "Golden chef's hat": 1/2808, "Golden apron": 1/2808, "Red elegant shirt": 1/2808, "Red elegant blouse": 1/2808, "Red elegant legs": 1/2808, "Red elegant skirt": 1/2808, "Green elegant shirt": 1/2808, "Green elegant blouse": 1/2808, "Green elegant legs": 1/2808, "Green elegant skirt": 1/2808, "Blue elegant shirt": 1/2808, "Blue elegant blouse": 1/2808, "Blue elegant legs": 1/2808, "Blue elegant skirt": 1/2808, "Team cape zero": 1/5616, "Team cape i": 1/5616, "Team cape x": 1/5616, "Cape of skulls": 1/5616, "Monk's robe top (g)": 1/14040, "Monk's robe (g)": 1/14040,  }
-    
-    loot_amount = {"Amulet of magic (t)": 1, "Wooden shield (g)": 1, "Black full helm (t)": 1, "Black platebody (t)": 1, "Black platelegs (t)": 1, "Black plateskirt (t)": 1, "Black kiteshield (t)": 1, "Black full helm (g)": 1, "Black platebody (g)": 1, "Black platelegs (g)": 1, "Black plateskirt (g)": 1, "Black kiteshield (g)": 1, "Black shield (h1)": 1, "Black shield (h2)": 1, "Black shield (h3)": 1, "Black shield (h4)": 1, "Black shield (h5)": 1, "Black helm (h1)": 1, "Black helm (h2)": 1, "Black helm (h3)": 1, "Black helm (h4)": 1, "Black helm (h5)": 1, "Black platebody (h1)": 1, "Black platebody (h2)": 1, "Black platebody (h3)": 1, "Black platebody (h4)": 1, "Black platebody (h5)": 1, "Steel full helm (t)": 1, "Steel platebody (t)": 1, "Steel platelegs (t)": 1, "Steel plateskirt (t)": 1, "Steel kiteshield (t)": 1, "Steel full helm (g)": 1, "Steel platebody (g)": 1, "Steel platelegs (g)": 1, "Steel plateskirt (g)": 1, "Steel kiteshield (g)": 1, "Iron full helm (t)": 1, "Iron platebody (t)": 1, "Iron platelegs (t)": 1, "Iron plateskirt (t)": 1, "Iron kiteshield (t)": 1, "Iron full helm (g)": 1, "Iron platebody (g)": 1, "Iron platelegs (g)": 1, "Iron plateskirt (g)": 1, "Iron kiteshield (g)": 1, "Bronze full helm (t)": 1, "Bronze platebody (t)": 1, "Bronze platelegs (t)": 1, "Bronze plateskirt (t)": 1, "Bronze kiteshield (t)": 1, "Bronze full helm (g)": 1, "Bronze platebody (g)": 1, "Bronze platelegs (g)": 1, "Bronze plateskirt (g)": 1, "Bronze kiteshield (g)": 1, "Studded body (g)": 1, "Studded chaps (g)": 1, "Studded body (t)": 1, "Studded chaps (t)": 1, "Leather body (g)": 1, "Leather chaps (g)": 1, "Blue wizard hat (g)": 1, "Blue wizard robe (g)": 1, "Blue skirt (g)": 1, "Blue wizard hat (t)": 1, "Blue wizard robe (t)": 1, "Blue skirt (t)": 1, "Black wizard hat (g)": 1, "Black wizard robe (g)": 1, "Black skirt (g)": 1, "Black wizard hat (t)": 1, "Black wizard robe (t)": 1, "Black skirt (t)": 1, "Saradomin robe top": 1, "Saradomin robe legs": 1, "Guthix robe top": 1, "Guthix robe legs": 1, "Zamorak robe top": 1, "Zamorak robe legs": 1, "Ancient robe top": 1, "Ancient robe legs": 1, "Armadyl robe top": 1, "Armadyl robe legs": 1, "Bandos robe top": 1, "Bandos robe legs": 1, "Bob's red shirt": 1, "Bob's green shirt": 1, "Bob's blue shirt": 1, "Bob's black shirt": 1, "Bob's purple shirt": 1, "Highwayman mask": 1, "Blue beret": 1, "Black beret": 1, "Red beret": 1, "White beret": 1, "A powdered wig": 1, "Beanie": 1, "Imp mask": 1, "Goblin mask": 1, "Sleeping cap": 1, "Flared trousers": 1, "Pantaloons": 1, "Black cane": 1, "Staff of bob the cat": 1, "Amulet of power (t)": 1, "Ham joint": 1, "Rain bow": 1, "Golden chef's hat": 1, "Golden apron": 1, "Red elegant shirt": 1, "Red elegant blouse": 1, "Red elegant legs": 1, "Red elegant skirt": 1, "Green elegant shirt": 1, "Green elegant blouse": 1, "Green elegant legs": 1, "Green elegant skirt": 1, "Blue elegant shirt": 1, "Blue elegant blouse": 1, "Blue elegant legs": 1, "Blue elegant skirt": 1, "Team cape zero": 1, "Team cape i": 1, "Team cape x": 1, "Cape of skulls": 1, "Monk's robe top (g)": 1, "Monk's robe (g)": 1,  }
+class clue_scroll(monster):
+    # Every casket rolls the same reward table loot_rolls times, so a clue is a boss with that many copies of one loot table.
+    # Items of the same rarity get lumped into a group that only tracks how many of them we have, and with them all
+    # being needed once every group is a chain the matrix free operator shifts at once. That keeps the state vector
+    # (a couple of copies of it is all the memory it takes) at the product of the group sizes instead of 2^items.
+    # A tier only needs its reward table, its amounts and its loot_rolls.
+    kc_name = 'caskets'
+    loot_rolls = 1
 
-    loot_rolls = 3
+    def lootTables(self):
+        return [self.loot_odds] * self.loot_rolls
 
     def roll_loot(self):
         loot = []
         for _ in range(self.loot_rolls):
-            l = random.choice(list(self.loot_odds.keys()))
-            loot += [l]
+            loot += super().roll_loot()
 
         return loot
 
-    def convertToTotals(self):
-        self.loot_totals = {}
-        
-        for _, v in self.loot_odds.items():
-            self.loot_totals[v] = 1 if v not in self.loot_totals.keys() else self.loot_totals[v] + 1
+    def chooseEngine(self, estimate):
+        # the copies of the table are too alike for the sparse matrices to be worth building, a roll is a handful of shifts
+        if(self.engine == 'auto' and estimate.memory['matrix-free'] <= self.maxMemory and estimate.work['matrix-free'] <= self.maxWork):
+            return 'matrix-free', f"{self.loot_rolls} rolls on the rarity groups of the reward table"
+        return super().chooseEngine(estimate)
 
-        print(self.loot_totals)
 
-    def convertToMarkovChain(self):
-        self.convertToTotals()
-        self.absorbingMatrix = self.constructMatrix()
-        return self.group_size == 1
-
-    def constructMatrix(self):
-        self.nStates = 2 ** len(self.loot_totals.keys()) * reduce(mul, [t + 1 for t in self.loot_totals.values()])
-        data = []
-        rowIndex = []
-        colIndex = []
-        for i in range(0,self.nStates):
-            rowTotal = 0
-
-            for lootIndex, (odds, total) in enumerate(self.loot_totals.items()):
-                state = self.indexToState(i, self.loot_totals)
-                
-                # if we already enough of this item group skip it
-                if(state[lootIndex] >= total):
-                    continue
-                
-                odds = self.itemOdds(odds, state[lootIndex], total)
-                
-                state[lootIndex] += 1
-                j = self.stateToIndex(state, self.loot_totals)
-                
-                data += [odds]
-                rowTotal += odds
-                rowIndex += [i]
-                colIndex += [j]
-
-            # add the diagonal
-            data += [1-rowTotal]
-            rowIndex += [i]
-            colIndex += [i]
-        
-        data = np.array(data)
-        rowIndex = np.array(rowIndex, dtype='int')
-        colIndex = np.array(colIndex, dtype='int')
-        return coo_matrix((data, (rowIndex, colIndex)), shape=(self.nStates,self.nStates)).tocsr()
+class easy_clues(clue_scroll):
+    # grouping the items by their rarity leaves 2 * 109 * 15 * 5 * 3 = 49050 states
+    loot_odds = {"Amulet of magic (t)": 1/360, "Wooden shield (g)": 1/1404, "Black full helm (t)": 1/1404, "Black platebody (t)": 1/1404, "Black platelegs (t)": 1/1404, "Black plateskirt (t)": 1/1404, "Black kiteshield (t)": 1/1404, "Black full helm (g)": 1/1404, "Black platebody (g)": 1/1404, "Black platelegs (g)": 1/1404, "Black plateskirt (g)": 1/1404, "Black kiteshield (g)": 1/1404, "Black shield (h1)": 1/1404, "Black shield (h2)": 1/1404, "Black shield (h3)": 1/1404, "Black shield (h4)": 1/1404, "Black shield (h5)": 1/1404, "Black helm (h1)": 1/1404, "Black helm (h2)": 1/1404, "Black helm (h3)": 1/1404, "Black helm (h4)": 1/1404, "Black helm (h5)": 1/1404, "Black platebody (h1)": 1/1404, "Black platebody (h2)": 1/1404, "Black platebody (h3)": 1/1404, "Black platebody (h4)": 1/1404, "Black platebody (h5)": 1/1404, "Steel full helm (t)": 1/1404, "Steel platebody (t)": 1/1404, "Steel platelegs (t)": 1/1404, "Steel plateskirt (t)": 1/1404, "Steel kiteshield (t)": 1/1404, "Steel full helm (g)": 1/1404, "Steel platebody (g)": 1/1404, "Steel platelegs (g)": 1/1404, "Steel plateskirt (g)": 1/1404, "Steel kiteshield (g)": 1/1404, "Iron full helm (t)": 1/1404, "Iron platebody (t)": 1/1404, "Iron platelegs (t)": 1/1404, "Iron plateskirt (t)": 1/1404, "Iron kiteshield (t)": 1/1404, "Iron full helm (g)": 1/1404, "Iron platebody (g)": 1/1404, "Iron platelegs (g)": 1/1404, "Iron plateskirt (g)": 1/1404, "Iron kiteshield (g)": 1/1404, "Bronze full helm (t)": 1/1404, "Bronze platebody (t)": 1/1404, "Bronze platelegs (t)": 1/1404, "Bronze plateskirt (t)": 1/1404, "Bronze kiteshield (t)": 1/1404, "Bronze full helm (g)": 1/1404, "Bronze platebody (g)": 1/1404, "Bronze platelegs (g)": 1/1404, "Bronze plateskirt (g)": 1/1404, "Bronze kiteshield (g)": 1/1404, "Studded body (g)": 1/1404, "Studded chaps (g)": 1/1404, "Studded body (t)": 1/1404, "Studded chaps (t)": 1/1404, "Leather body (g)": 1/1404, "Leather chaps (g)": 1/1404, "Blue wizard hat (g)": 1/1404, "Blue wizard robe (g)": 1/1404, "Blue skirt (g)": 1/1404, "Blue wizard hat (t)": 1/1404, "Blue wizard robe (t)": 1/1404, "Blue skirt (t)": 1/1404, "Black wizard hat (g)": 1/1404, "Black wizard robe (g)": 1/1404, "Black skirt (g)": 1/1404, "Black wizard hat (t)": 1/1404, "Black wizard robe (t)": 1/1404, "Black skirt (t)": 1/1404, "Saradomin robe top": 1/1404, "Saradomin robe legs": 1/1404, "Guthix robe top": 1/1404, "Guthix robe legs": 1/1404, "Zamorak robe top": 1/1404, "Zamorak robe legs": 1/1404, "Ancient robe top": 1/1404, "Ancient robe legs": 1/1404, "Armadyl robe top": 1/1404, "Armadyl robe legs": 1/1404, "Bandos robe top": 1/1404, "Bandos robe legs": 1/1404, "Bob's red shirt": 1/1404, "Bob's green shirt": 1/1404, "Bob's blue shirt": 1/1404, "Bob's black shirt": 1/1404, "Bob's purple shirt": 1/1404, "Highwayman mask": 1/1404, "Blue beret": 1/1404, "Black beret": 1/1404, "Red beret": 1/1404, "White beret": 1/1404, "A powdered wig": 1/1404, "Beanie": 1/1404, "Imp mask": 1/1404, "Goblin mask": 1/1404, "Sleeping cap": 1/1404, "Flared trousers": 1/1404, "Pantaloons": 1/1404, "Black cane": 1/1404, "Staff of bob the cat": 1/1404, "Amulet of power (t)": 1/1404, "Ham joint": 1/1404, "Rain bow": 1/1404, "Golden chef's hat": 1/2808, "Golden apron": 1/2808, "Red elegant shirt": 1/2808, "Red elegant blouse": 1/2808, "Red elegant legs": 1/2808, "Red elegant skirt": 1/2808, "Green elegant shirt": 1/2808, "Green elegant blouse": 1/2808, "Green elegant legs": 1/2808, "Green elegant skirt": 1/2808, "Blue elegant shirt": 1/2808, "Blue elegant blouse": 1/2808, "Blue elegant legs": 1/2808, "Blue elegant skirt": 1/2808, "Team cape zero": 1/5616, "Team cape i": 1/5616, "Team cape x": 1/5616, "Cape of skulls": 1/5616, "Monk's robe top (g)": 1/14040, "Monk's robe (g)": 1/14040,  }
+    
+    loot_amount = {"Amulet of magic (t)": 1, "Wooden shield (g)": 1, "Black full helm (t)": 1, "Black platebody (t)": 1, "Black platelegs (t)": 1, "Black plateskirt (t)": 1, "Black kiteshield (t)": 1, "Black full helm (g)": 1, "Black platebody (g)": 1, "Black platelegs (g)": 1, "Black plateskirt (g)": 1, "Black kiteshield (g)": 1, "Black shield (h1)": 1, "Black shield (h2)": 1, "Black shield (h3)": 1, "Black shield (h4)": 1, "Black shield (h5)": 1, "Black helm (h1)": 1, "Black helm (h2)": 1, "Black helm (h3)": 1, "Black helm (h4)": 1, "Black helm (h5)": 1, "Black platebody (h1)": 1, "Black platebody (h2)": 1, "Black platebody (h3)": 1, "Black platebody (h4)": 1, "Black platebody (h5)": 1, "Steel full helm (t)": 1, "Steel platebody (t)": 1, "Steel platelegs (t)": 1, "Steel plateskirt (t)": 1, "Steel kiteshield (t)": 1, "Steel full helm (g)": 1, "Steel platebody (g)": 1, "Steel platelegs (g)": 1, "Steel plateskirt (g)": 1, "Steel kiteshield (g)": 1, "Iron full helm (t)": 1, "Iron platebody (t)": 1, "Iron platelegs (t)": 1, "Iron plateskirt (t)": 1, "Iron kiteshield (t)": 1, "Iron full helm (g)": 1, "Iron platebody (g)": 1, "Iron platelegs (g)": 1, "Iron plateskirt (g)": 1, "Iron kiteshield (g)": 1, "Bronze full helm (t)": 1, "Bronze platebody (t)": 1, "Bronze platelegs (t)": 1, "Bronze plateskirt (t)": 1, "Bronze kiteshield (t)": 1, "Bronze full helm (g)": 1, "Bronze platebody (g)": 1, "Bronze platelegs (g)": 1, "Bronze plateskirt (g)": 1, "Bronze kiteshield (g)": 1, "Studded body (g)": 1, "Studded chaps (g)": 1, "Studded body (t)": 1, "Studded chaps (t)": 1, "Leather body (g)": 1, "Leather chaps (g)": 1, "Blue wizard hat (g)": 1, "Blue wizard robe (g)": 1, "Blue skirt (g)": 1, "Blue wizard hat (t)": 1, "Blue wizard robe (t)": 1, "Blue skirt (t)": 1, "Black wizard hat (g)": 1, "Black wizard robe (g)": 1, "Black skirt (g)": 1, "Black wizard hat (t)": 1, "Black wizard robe (t)": 1, "Black skirt (t)": 1, "Saradomin robe top": 1, "Saradomin robe legs": 1, "Guthix robe top": 1, "Guthix robe legs": 1, "Zamorak robe top": 1, "Zamorak robe legs": 1, "Ancient robe top": 1, "Ancient robe legs": 1, "Armadyl robe top": 1, "Armadyl robe legs": 1, "Bandos robe top": 1, "Bandos robe legs": 1, "Bob's red shirt": 1, "Bob's green shirt": 1, "Bob's blue shirt": 1, "Bob's black shirt": 1, "Bob's purple shirt": 1, "Highwayman mask": 1, "Blue beret": 1, "Black beret": 1, "Red beret": 1, "White beret": 1, "A powdered wig": 1, "Beanie": 1, "Imp mask": 1, "Goblin mask": 1, "Sleeping cap": 1, "Flared trousers": 1, "Pantaloons": 1, "Black cane": 1, "Staff of bob the cat": 1, "Amulet of power (t)": 1, "Ham joint": 1, "Rain bow": 1, "Golden chef's hat": 1, "Golden apron": 1, "Red elegant shirt": 1, "Red elegant blouse": 1, "Red elegant legs": 1, "Red elegant skirt": 1, "Green elegant shirt": 1, "Green elegant blouse": 1, "Green elegant legs": 1, "Green elegant skirt": 1, "Blue elegant shirt": 1, "Blue elegant blouse": 1, "Blue elegant legs": 1, "Blue elegant skirt": 1, "Team cape zero": 1, "Team cape i": 1, "Team cape x": 1, "Cape of skulls": 1, "Monk's robe top (g)": 1, "Monk's robe (g)": 1,  }
 
-    def itemOdds(self, baseOdds, current, total):
-        # Return the odds of getting a new item of the same rarity 
-        return baseOdds * total / current
+    loot_rolls = 3
 
 
 class theatre_of_blood(monster):
@@ -677,61 +936,79 @@ class chambers_of_xeric(monster):
 
     unique_loot_point_cap = 570000
     unique_loot_odds_at_cap = 0.657
-    # this doesn't deal properly with points over the point cap
-    odds_adjustment = min(team_points, unique_loot_point_cap)/unique_loot_point_cap * unique_loot_odds_at_cap * personal_points/team_points
 
     loot_odds = {"dexterous prayer scroll":20/69,"arcane prayer scroll":20/69,"twisted buckler":4/69,"dragon hunter crossbow":4/69,"dinh's bulwark":3/69,"ancestral hat":3/69,"ancestral robe top":3/69,"ancestral robe bottom":3/69, "dragon claws":3/69,"elder maul":2/69,"kodai insignia":2/69,"twisted bow":2/69}
-    for drop in loot_odds:
-        loot_odds[drop] *= odds_adjustment
     loot_amount = {"dexterous prayer scroll":1,"arcane prayer scroll":1,"twisted buckler":1,"dragon hunter crossbow":1,"dinh's bulwark":1,"ancestral hat":1,"ancestral robe top":1,"ancestral robe bottom":1, "dragon claws":1,"elder maul":1,"kodai insignia":1,"twisted bow":1}
 
+    def __init__(self, team_points=team_points, personal_points=personal_points, **kwargs):
+        # this doesn't deal properly with points over the point cap
+        odds_adjustment = min(team_points, self.unique_loot_point_cap)/self.unique_loot_point_cap * self.unique_loot_odds_at_cap * personal_points/team_points
+        self.loot_odds = self.loot_odds.copy()
+        for drop in self.loot_odds:
+            self.loot_odds[drop] *= odds_adjustment
+        super().__init__(**kwargs)
+        self.team_points = team_points
+        self.personal_points = personal_points
+
 
 class chaos_elemental(monster):
     loot_odds = {"Dragon pickaxe":1/256,"Dragon 2h sword":20/69}
     loot_amount = {"Dragon pickaxe":0, "Dragon 2h sword":0}
 
 
-def optionalBosses():
-    hydra = alchemical_hydra(loot_amount={"ring piece":3,"hydra tail":1,"hydra leather":1,"hydra's claw":1,"dragon thrownaxe":0,"dragon knife":0}, name="Alchemical Hydra + brimstone ring")
-    hydra2 = alchemical_hydra(loot_amount={"ring piece":3,"hydra tail":1,"hydra leather":1,"hydra's claw":1,"dragon thrownaxe":1,"dragon knife":1}, name="Alchemical Hydra + brimstone ring + knives&axes")
-    krak = cave_kraken(loot_amount={"kraken tentacle":11, "trident of the seas (full)":1}, name="Cave Kraken + 11 tents")
-    kq = kalphite_queen(loot_amount={"dragon chain":1,"dragon 2h sword":1}, name= "Kalphite Queen chain+2h")
-    ce = chaos_elemental(loot_amount = {"Dragon pickaxe":1, "Dragon 2h sword":0}, name="Chaos Elemental dpick")
-    kbd = king_black_dragon(loot_amount={"dragon pickaxe":1, "draconic visage":1/5000}, name="King Black Dragon, visage + pick")
-    ven = venenatis(loot_amount={"treasonous ring":1,"dragon pickaxe":1,"dragon 2h sword":1}, name="Wildy boss, ring + pick + 2h")
-    ven2 = venenatis(loot_amount={"treasonous ring":1,"dragon pickaxe":1,"dragon 2h sword":0}, name="Wildy boss, ring + pick")
-    ven3 = venenatis(loot_amount={"treasonous ring":0,"dragon pickaxe":1,"dragon 2h sword":0}, name="Wildy boss just the d pick")
-    cerb = cerberus(loot_amount = {"primordial crystal":1,"pegasian_crystal":1,"eternal crystal":1,"smouldering stone":1}, name="Cerberus + 1 smouldering")
-    cerb2 = cerberus(loot_amount = {"primordial crystal":1,"pegasian_crystal":1,"eternal crystal":1,"smouldering stone":3}, name= "Cerberus + 3 smouldering")
-    sire = abyssal_sire(loot_amount = {"bludgeon piece":3, "abyssal dagger":1}, name= "Abyssal Sire + dagger")
-    dks = dkings(name="Dagannoth Kings")
-    corp = corporeal_beast(loot_amount = {"arcane sigil":1,"spectral sigil":1,"elysian sigil":1,"spirit shield":3,"holy elixer":3}, name = "Corporeal Beast + 3 blessed shields")
-    zul = zulrah(loot_amount = {"tanzanite fang":1,"magic fang":1,"serpentine visage":1,"uncut onyx":1, "magma mutagen":1, "tanzanite mutagen":1}, name="Zulrah + onyx + mutagens")
-    zul2 = zulrah(loot_amount = {"tanzanite fang":1,"magic fang":2,"serpentine visage":1,"uncut onyx":0, "magma mutagen":0, "tanzanite mutagen":0}, name="Zulrah, 2 magic fangs")
-    night = nightmare(loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":3, "eldritch orb":1, "harmonised orb":1,"volatile orb":1}, name="Nightmare 3 staves")
-    pnight = phosanis_nightmare(loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":3, "eldritch orb":1, "harmonised orb":1,"volatile orb":1}, name="Phosanis nightmare, 3 staves")
-    pnightinq = phosanis_nightmare(loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":0, "eldritch orb":0, "harmonised orb":0,"volatile orb":0}, name="Phosanis nightmare, full inq + mace")
-    pnightjustinq = phosanis_nightmare(loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":0, "nightmare staff":0, "eldritch orb":0, "harmonised orb":0,"volatile orb":0}, name="Phosanis nightmare, full inq, no mace")
-    vork = vorkath(loot_amount = {"dragonbone necklace":1,"skeletal visage":1,"draconic visage":1}, name="Vorkath, both visages")
-    cg = corrupted_gauntlet(loot_amount={"enhanced crystal weapon seed":2, "crystal armour seed":6}, name="Corrupted gauntlet, 2 enhanced weapon seeds, 6 armour crystals")
-    cg1seed = corrupted_gauntlet(loot_amount={"enhanced crystal weapon seed":1, "crystal armour seed":6}, name="Corrupted gauntlet, 1 enhanced weapon seeds, 6 armour crystals")
-
-    temp = tempoross(loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":1, "Tome of water":1, "dragon harpoon":0}, name="tempoross, big harpoonfish")
-    temp1 = tempoross(loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":0, "Tome of water":1, "dragon harpoon":1}, name="tempoross, dragon harpoon")
-    temp2 = tempoross(loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":1, "Tome of water":1, "dragon harpoon":1}, name="\ntempoross, dragon harpoon + big harpoonfish")
-
-    nextorvanihilvambraces = nex(loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1}, name= "Nex, torva + vambraces + nihil")
-    nextorvavambraces = nex(loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1}, name= "Nex, torva + vambraces")
-    nextorva = nex(loot_amount = {"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1}, name= "Nex, just torva")
-    nex6man = nex(loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1, "Ancient hilt":1}, teamsize=6, name="nex, (assuming 6 man)")
-    nex8man = nex(loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1, "Ancient hilt":1}, teamsize=8, name="nex, (assuming 8 man)")
-
-    tob3man = theatre_of_blood(loot_amount = {"scythe of vitur":1, "grazi rapier":1,"sanguinesti staff":1, "justiciar faceguard":1, "justiciar chestguard":1, "justiciar legguard":1, "avernic hilt":1}, name="Theatre of blood (3 man)", teamsize=3)
-    zalcano3tool = zalcano(loot_amount = {"crystal tool seed":3, "zalcano shard":0}, name="Zalcano 3 tool seeds")
-
-    hardMode3man = theatre_of_blood_hard_mode(loot_amount = {"scythe of vitur":1, "grazi rapier":1,"sanguinesti staff":1, "justiciar faceguard":1, "justiciar chestguard":1, "justiciar legguard":1, "avernic hilt":1, "Sanguine dust":0, "Sanguine ornament kit":0,"holy ornament kit":0}, name="Theatre of blood hardmode (3 man)", teamsize=3)
-    hardModeJustKits = theatre_of_blood_hard_mode(loot_amount = {"scythe of vitur":0, "grazi rapier":0,"sanguinesti staff":0, "justiciar faceguard":0, "justiciar chestguard":0, "justiciar legguard":0, "avernic hilt":0, "Sanguine dust":1, "Sanguine ornament kit":1,"holy ornament kit":1}, name="Theatre of blood hardmode kits", teamsize=3)
-    hardMode3holy = theatre_of_blood_hard_mode(loot_amount = {"scythe of vitur":0, "grazi rapier":0,"sanguinesti staff":0, "justiciar faceguard":0, "justiciar chestguard":0, "justiciar legguard":0, "avernic hilt":0, "Sanguine dust":1, "Sanguine ornament kit":1,"holy ornament kit":3}, name="Theatre of blood hardmode 3 holy kits", teamsize=3)
+def sweep(bosses, threshold=0.99999):
+    # Computes the graphs of many settings of the same boss together, e.g. chambers_of_xeric at different points or nex at
+    # different teamsizes. The bosses have to need the same items from the same loot tables, only the odds can differ.
+    models = [boss.model() for boss in bosses]
+    first = models[0]
+    for boss, model in zip(bosses, models):
+        if(model.items != first.items or not np.array_equal(model.targets, first.targets) or model.odds.shape != first.odds.shape or not np.array_equal(model.odds > 0, first.odds > 0)):
+            raise ValueError(f"{boss.name} doesn't have the same loot tables and drops as {bosses[0].name}")
+
+    cdfs = OddsSweep([model.odds for model in models], first.targets).propagateCdfs(threshold)
+    return [boss.graphFromCdf(y) for boss, y in zip(bosses, cdfs)]
+
+def optionalBossFactories():
+    hydra = functools.partial(alchemical_hydra, loot_amount={"ring piece":3,"hydra tail":1,"hydra leather":1,"hydra's claw":1,"dragon thrownaxe":0,"dragon knife":0}, name="Alchemical Hydra + brimstone ring")
+    hydra2 = functools.partial(alchemical_hydra, loot_amount={"ring piece":3,"hydra tail":1,"hydra leather":1,"hydra's claw":1,"dragon thrownaxe":1,"dragon knife":1}, name="Alchemical Hydra + brimstone ring + knives&axes")
+    krak = functools.partial(cave_kraken, loot_amount={"kraken tentacle":11, "trident of the seas (full)":1}, name="Cave Kraken + 11 tents")
+    kq = functools.partial(kalphite_queen, loot_amount={"dragon chain":1,"dragon 2h sword":1}, name= "Kalphite Queen chain+2h")
+    ce = functools.partial(chaos_elemental, loot_amount = {"Dragon pickaxe":1, "Dragon 2h sword":0}, name="Chaos Elemental dpick")
+    kbd = functools.partial(king_black_dragon, loot_amount={"dragon pickaxe":1, "draconic visage":1}, name="King Black Dragon, visage + pick")
+    ven = functools.partial(venenatis, loot_amount={"treasonous ring":1,"dragon pickaxe":1,"dragon 2h sword":1}, name="Wildy boss, ring + pick + 2h")
+    ven2 = functools.partial(venenatis, loot_amount={"treasonous ring":1,"dragon pickaxe":1,"dragon 2h sword":0}, name="Wildy boss, ring + pick")
+    ven3 = functools.partial(venenatis, loot_amount={"treasonous ring":0,"dragon pickaxe":1,"dragon 2h sword":0}, name="Wildy boss just the d pick")
+    cerb = functools.partial(cerberus, loot_amount = {"primordial crystal":1,"pegasian_crystal":1,"eternal crystal":1,"smouldering stone":1}, name="Cerberus + 1 smouldering")
+    cerb2 = functools.partial(cerberus, loot_amount = {"primordial crystal":1,"pegasian_crystal":1,"eternal crystal":1,"smouldering stone":3}, name= "Cerberus + 3 smouldering")
+    sire = functools.partial(abyssal_sire, loot_amount = {"bludgeon piece":3, "abyssal dagger":1}, name= "Abyssal Sire + dagger")
+    dks = functools.partial(dkings, name="Dagannoth Kings")
+    corp = functools.partial(corporeal_beast, loot_amount = {"arcane sigil":1,"spectral sigil":1,"elysian sigil":1,"spirit shield":3,"holy elixer":3}, name = "Corporeal Beast + 3 blessed shields")
+    zul = functools.partial(zulrah, loot_amount = {"tanzanite fang":1,"magic fang":1,"serpentine visage":1,"uncut onyx":1, "magma mutagen":1, "tanzanite mutagen":1}, name="Zulrah + onyx + mutagens")
+    zul2 = functools.partial(zulrah, loot_amount = {"tanzanite fang":1,"magic fang":2,"serpentine visage":1,"uncut onyx":0, "magma mutagen":0, "tanzanite mutagen":0}, name="Zulrah, 2 magic fangs")
+    night = functools.partial(nightmare, loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":3, "eldritch orb":1, "harmonised orb":1,"volatile orb":1}, name="Nightmare 3 staves")
+    pnight = functools.partial(phosanis_nightmare, loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":3, "eldritch orb":1, "harmonised orb":1,"volatile orb":1}, name="Phosanis nightmare, 3 staves")
+    pnightinq = functools.partial(phosanis_nightmare, loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":1, "nightmare staff":0, "eldritch orb":0, "harmonised orb":0,"volatile orb":0}, name="Phosanis nightmare, full inq + mace")
+    pnightjustinq = functools.partial(phosanis_nightmare, loot_amount = {"inquisitor's great helm":1,"inquisitor's hauberk":1,"inquisitor's plateskirt":1, "inquisitor's mace":0, "nightmare staff":0, "eldritch orb":0, "harmonised orb":0,"volatile orb":0}, name="Phosanis nightmare, full inq, no mace")
+    vork = functools.partial(vorkath, loot_amount = {"dragonbone necklace":1,"skeletal visage":1,"draconic visage":1}, name="Vorkath, both visages")
+    cg = functools.partial(corrupted_gauntlet, loot_amount={"enhanced crystal weapon seed":2, "crystal armour seed":6}, name="Corrupted gauntlet, 2 enhanced weapon seeds, 6 armour crystals")
+    cg1seed = functools.partial(corrupted_gauntlet, loot_amount={"enhanced crystal weapon seed":1, "crystal armour seed":6}, name="Corrupted gauntlet, 1 enhanced weapon seeds, 6 armour crystals")
+
+    temp = functools.partial(tempoross, loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":1, "Tome of water":1, "dragon harpoon":0}, name="tempoross, big harpoonfish")
+    temp1 = functools.partial(tempoross, loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":0, "Tome of water":1, "dragon harpoon":1}, name="tempoross, dragon harpoon")
+    temp2 = functools.partial(tempoross, loot_amount = {"soaked page":1, "fish barrel":1, "tackle box":1, "big harpoonfish":1, "Tome of water":1, "dragon harpoon":1}, name="\ntempoross, dragon harpoon + big harpoonfish")
+
+    nextorvanihilvambraces = functools.partial(nex, loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1}, name= "Nex, torva + vambraces + nihil")
+    nextorvavambraces = functools.partial(nex, loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1}, name= "Nex, torva + vambraces")
+    nextorva = functools.partial(nex, loot_amount = {"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1}, name= "Nex, just torva")
+    nex6man = functools.partial(nex, loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1, "Ancient hilt":1}, teamsize=6, name="nex, (assuming 6 man)")
+    nex8man = functools.partial(nex, loot_amount = {"Zaryte vambraces":1,"Torva full helm (damaged)":1,"Torva platebody (damaged)":1, "Torva platelegs (damaged)":1, "Nihil horn":1, "Ancient hilt":1}, teamsize=8, name="nex, (assuming 8 man)")
+
+    tob3man = functools.partial(theatre_of_blood, loot_amount = {"scythe of vitur":1, "grazi rapier":1,"sanguinesti staff":1, "justiciar faceguard":1, "justiciar chestguard":1, "justiciar legguard":1, "avernic hilt":1}, name="Theatre of blood (3 man)", teamsize=3)
+    zalcano3tool = functools.partial(zalcano, loot_amount = {"crystal tool seed":3, "zalcano shard":0}, name="Zalcano 3 tool seeds")
+
+    hardMode3man = functools.partial(theatre_of_blood_hard_mode, loot_amount = {"scythe of vitur":1, "grazi rapier":1,"sanguinesti staff":1, "justiciar faceguard":1, "justiciar chestguard":1, "justiciar legguard":1, "avernic hilt":1, "Sanguine dust":0, "Sanguine ornament kit":0,"holy ornament kit":0}, name="Theatre of blood hardmode (3 man)", teamsize=3)
+    hardModeJustKits = functools.partial(theatre_of_blood_hard_mode, loot_amount = {"scythe of vitur":0, "grazi rapier":0,"sanguinesti staff":0, "justiciar faceguard":0, "justiciar chestguard":0, "justiciar legguard":0, "avernic hilt":0, "Sanguine dust":1, "Sanguine ornament kit":1,"holy ornament kit":1}, name="Theatre of blood hardmode kits", teamsize=3)
+    hardMode3holy = functools.partial(theatre_of_blood_hard_mode, loot_amount = {"scythe of vitur":0, "grazi rapier":0,"sanguinesti staff":0, "justiciar faceguard":0, "justiciar chestguard":0, "justiciar legguard":0, "avernic hilt":0, "Sanguine dust":1, "Sanguine ornament kit":1,"holy ornament kit":3}, name="Theatre of blood hardmode 3 holy kits", teamsize=3)
 
     return [
         temp,
@@ -772,54 +1049,80 @@ def optionalBosses():
         hardMode3holy
     ]
 
+def allBossFactories():
+    return [
+        theatre_of_blood,
+        chambers_of_xeric,
+        theatre_of_blood_hard_mode,
+        barrows,
+        nex,
+        phosanis_nightmare,
+        tempoross,
+        nightmare,
+        grotesque_guardians,
+        abyssal_sire,
+        cave_kraken,
+        cerberus,
+        thermonuclear_smoke_devil,
+        alchemical_hydra,
+        chaos_fanatic,
+        crazy_archaeologist,
+        scorpia,
+        vetion,
+        venenatis,
+        callisto,
+        obor,
+        bryophyta,
+        mimic,
+        hespori,
+        zalcano,
+        wintertodt,
+        corrupted_gauntlet,
+        gauntlet,
+        dagannoth_rex,
+        dagannoth_supreme,
+        dagannoth_prime,
+        sarachnis,
+        kalphite_queen,
+        zulrah,
+        vorkath,
+        corporeal_beast,
+        commander_zilyana,
+        general_graardor,
+        kril_tsutsaroth,
+        kree_arra,
+        chaos_elemental,
+        theatre_of_blood_hard_mode,
+        guardians_of_the_rift
+    ]
+
+def optionalBosses():
+    return [factory() for factory in optionalBossFactories()]
+
 def allBosses():
+    return [factory() for factory in allBossFactories()]
+
+def factoryName(factory):
+    # the name the boss will get, without having to construct it
+    if(isinstance(factory, functools.partial)):
+        return factory.keywords.get('name', factory.func.__name__)
+    return factory.__name__
+
+@functools.lru_cache(maxsize=None)
+def bossFactories():
+    # every boss and variant by name, nothing gets constructed until its factory is called
+    factories = {}
+    for factory in allBossFactories() + optionalBossFactories() + clueFactories():
+        factories.setdefault(factoryName(factory), factory)
+    return factories
+
+def createBoss(name):
+    return bossFactories()[name]()
+
+def clueFactories():
     return [
-        theatre_of_blood(),
-        chambers_of_xeric(),
-        theatre_of_blood_hard_mode(),
-        barrows(),
-        nex(),
-        phosanis_nightmare(),
-        tempoross(),
-        nightmare(),
-        grotesque_guardians(),
-        abyssal_sire(),
-        cave_kraken(),
-        cerberus(),
-        thermonuclear_smoke_devil(),
-        alchemical_hydra(),
-        chaos_fanatic(),
-        crazy_archaeologist(),
-        scorpia(),
-        vetion(),
-        venenatis(),
-        callisto(),
-        obor(),
-        bryophyta(),
-        mimic(),
-        hespori(),
-        zalcano(),
-        wintertodt(),
-        corrupted_gauntlet(),
-        gauntlet(),
-        dagannoth_rex(),
-        dagannoth_supreme(),
-        dagannoth_prime(),
-        sarachnis(),
-        kalphite_queen(),
-        zulrah(),
-        vorkath(),
-        corporeal_beast(),
-        commander_zilyana(),
-        general_graardor(),
-        kril_tsutsaroth(),
-        kree_arra(),
-        chaos_elemental(),
-        theatre_of_blood_hard_mode(),
-        guardians_of_the_rift()
+        easy_clues
     ]
 
 def clues():
-    return [
-        easy_clues()
-    ]
\ No newline at end of file
+    return [factory() for factory in clueFactories()]
\ No newline at end of file
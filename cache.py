@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# bump this whenever a change to the engines changes their results, so old entries aren't used anymore
+engineVersion = 2
+
+
+class ResultCache:
+    # On disk cache of the chain and graph data of a boss, keyed by a hash of everything that goes into computing them.
+    # Rerunning after changing the rates of one boss only recomputes that boss. Entries are compressed npz files,
+    # when the cache grows over maxBytes the least recently used entries are removed.
+    def __init__(self, directory='.cache', maxBytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def engine(self, boss):
+        # the engine the boss gets computed with, the same choice convertToMarkovChain makes
+        return boss.chooseEngine(boss.estimateChain())[0]
+
+    def cacheable(self, boss):
+        # simulated cdfs are different every run and far less precise than the exact engines, they're never cached
+        return self.engine(boss) != 'monte-carlo'
+
+    def key(self, boss):
+        # the class is part of the key because bosses like barrows build their chain in their own way,
+        # the model's key covers the items, their odds on every loot table and the amounts we need
+        spec = {
+            'class': type(boss).__name__,
+            'model': boss.model().key,
+            'group_size': boss.group_size,
+            'engine': engineVersion,
+            'chosen': self.engine(boss),
+        }
+        # single precision results are cached apart, the key of double precision ones stays the same
+        if(boss.propagationDtype != 'float64'):
+            spec['dtype'] = boss.propagationDtype
+        return hashlib.sha256(json.dumps(spec).encode()).hexdigest()
+
+    def path(self, boss):
+        return os.path.join(self.directory, f"{self.key(boss)}.npz")
+
+    def get(self, boss):
+        # returns the graph data from getAbsorbingMatrixGraph and the transition matrices of the loot tables (if there were any) or None
+        if(not self.cacheable(boss)):
+            return None
+        path = self.path(boss)
+        try:
+            with np.load(path) as data:
+                graph = (data['x'], data['cdf'], data['pdf'], int(data['mode']), int(data['median']), float(data['mean']), int(data['cutoff']))
+                matrices = [csr_matrix((data[f'matrix{i}Data'], data[f'matrix{i}Indices'], data[f'matrix{i}Indptr']), shape=tuple(data[f'matrix{i}Shape'])) for i in range(int(data['matrices']))]
+            # mark it as recently used
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+
+        return graph, matrices
+
+    def put(self, boss, graph, matrices=()):
+        if(not self.cacheable(boss)):
+            return
+        (x, cdf, pdf, mode, median, mean, cutoff) = graph
+        arrays = {'x': x, 'cdf': cdf, 'pdf': pdf, 'mode': mode, 'median': median, 'mean': mean, 'cutoff': cutoff, 'matrices': len(matrices)}
+        for i, matrix in enumerate(matrices):
+            matrix = csr_matrix(matrix)
+            arrays.update({f'matrix{i}Data': matrix.data, f'matrix{i}Indices': matrix.indices, f'matrix{i}Indptr': matrix.indptr, f'matrix{i}Shape': matrix.shape})
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(boss)
+        # write to a temporary file first so other processes never see half written entries
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temporary, path)
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if(not name.endswith('.npz')):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries += [(stat.st_mtime, stat.st_size, name)]
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if(total <= self.maxBytes):
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                # another worker got to it first
+                pass
+            total -= size
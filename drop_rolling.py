@@ -1,121 +1,194 @@
-from bosses import optionalBosses, allBosses
-import matplotlib
-from collections import Counter
-from multiprocessing import Pool
-matplotlib.use('agg')
-import matplotlib.pyplot as plt
-
-pool_size = 10
+from bosses import bossFactories, createBoss, monster
+from simulation import histogram_stats, parallel_completion, sequential_completion
+from cache import ResultCache
+from scheduler import Scheduler
+import instrumentation
+from results import dataDirectory, completionPath, writeCompletion, writeSummaryTable
+import numpy as np
+import argparse
+import fnmatch
+import functools
+import os
+import time
+import traceback
+
+pool_size = os.cpu_count()
 number_off_completions = 1000000
+cache = ResultCache()
     
-def simulate_average_completion(boss, sample_size=number_off_completions):
-    completions = []
+def simulate_average_completion(boss, sample_size=number_off_completions, workers=1, seed=None, render=True, directory='images'):
+    # the same seed and amount of workers always give the same completions
+    histogram = parallel_completion(boss.model(), sample_size, workers, seed)
+
+    average_completion, half, least, most = histogram_stats(histogram)
+    print("{},{},{},{},{}".format(boss.name,average_completion,least,most,half))
+
+    if render:
+        from plotting import renderSimulation
+        renderSimulation(boss.name, histogram, directory)
+    return histogram
+
+def simulate_until_precise(boss, precision=0.01, quantiles=(0.5, 0.9, 0.99), max_samples=number_off_completions * 10, render=True, directory='images'):
+    # simulates in batches until the mean and quantiles are known to within precision instead of a fixed amount of players
+    result = sequential_completion(boss.model(), quantiles, precision, max_samples=max_samples)
+    (mean, error) = result['mean']
+    quantileString = ', '.join(f"{q:.0%}: {estimate} ({low}-{high})" for q, (estimate, low, high) in result['quantiles'].items())
+    print(f"{boss.name} (group size {boss.group_size}), {result['samples']} samples{'' if result['precise'] else ' (not precise enough)'}, mean: {mean:.2f} +- {error:.2f}, {quantileString}")
+
+    if render:
+        from plotting import renderSimulation
+        renderSimulation(boss.name, np.bincount(result['completions']), directory)
+    return result
+
+def computeCompletion(boss, directory=dataDirectory, cache=cache):
+    # the compute stage, writes the distribution and stats of the boss for the render stage.
+    # returns the path it wrote to (None when the boss can't be computed) and whether it came from the cache
+    print(boss.name + '\n')
+    with instrumentation.phase(boss, 'cache') as fields:
+        cached = cache.get(boss)
+        fields['hit'] = cached is not None
+    if cached:
+        print(boss.name, 'loaded from cache')
+        (graph, boss.transitionMatrices) = cached
+    else:
+        with instrumentation.phase(boss, 'convert') as fields:
+            converted = boss.convertToMarkovChain()
+            fields['states'] = boss.nStates
+            fields['engine'] = boss.chosenEngine
+            fields['reason'] = boss.engineReason
+            if boss.transitionMatrices:
+                fields['nnz'] = sum(matrix.nnz for matrix in boss.transitionMatrices)
+        if not converted:
+            print(boss.name, 'State space too large\n')
+            return None, False
+        print(boss.name, 'created matrix')
+        graph = boss.getAbsorbingMatrixGraph()
+        print(boss.name, 'created datapoints')
+        with instrumentation.phase(boss, 'store'):
+            cache.put(boss, graph, boss.transitionMatrices)
+
+    with instrumentation.phase(boss, 'export'):
+        return writeCompletion(boss, graph, directory), cached is not None
 
-    for _ in range(sample_size):
-        kc, _ = boss.complete()
-        completions += [kc]
+def createCompletionPlot(boss):
+    from plotting import renderCompletionPlot
+    path, _ = computeCompletion(boss)
+    if path is not None:
+        renderCompletionPlot(path)
 
-    average_completion = sum(completions)/len(completions)
-    print("{},{},{},{},{}".format(boss.name,average_completion,min(completions),max(completions),sorted(completions)[int(len(completions)/2)]))
-    
-    c = Counter(completions)
-    x = sorted(list(c.keys()))
-    y = [c[it] for it in x]
-
-    _, ax = plt.subplots()
-    #axis labels
-    ax.set_ylabel('number of completions')
-    ax.set_xlabel('kc')
-    
-    #data points
-    ax.plot(x,y, 'o', markersize=1, label='boss completion')
-    
-    #lines at relevant points
-    half = sorted(completions)[int(len(completions)/2)]
-    ax.axvline(x=half, color='r', label="50% of people completed at {} kc".format(half))
-    ax.axvline(x=average_completion, color='g', label="average completion at {} kc".format(int(average_completion)+1))
-    
-    #title
-    ax.set_title("{} completions of {}".format(sample_size, boss.name))
-    ax.legend()
-    plt.savefig("images/{}_{}.pdf".format(sample_size, boss.name, bbox_inches='tight'))
 
-def createCompletionPlot(boss):
-    print(boss.name + '\n')
-    if not boss.convertToMarkovChain():
-        print(boss.name, 'State space too large\n')
-        return
-    print(boss.name, 'created matrix')
-    (x, cdf, pdf, mode, half, average, xcutoff) = boss.getAbsorbingMatrixGraph()
-    print(boss.name, 'created datapoints')
 
-    
-    lootstring = ''
-    count = 0
-    items = [f"{item.title()}: {amount}" for item, amount in boss.loot_amount.items() if amount > 0]
-    for it,part in enumerate(items):
-        lootstring = f"{lootstring} {part}{', ' if it < len(items) - 1 else ''}"
-        count += len(part)
-        if count >= 70:
-            lootstring = f"{lootstring}\n"
-            count = 0
-    
-    _, (ax) = plt.subplots()
-    kc_name = boss.kc_name
-    #axis labels
-    ax.set_xlabel(f"{kc_name}\n\n{kc_name} it takes to get:\n {lootstring}")
-
-    ax2 = ax.twinx()
-    legend = ax.twinx()
-    legend.axes.yaxis.set_visible(False)
-    
-    #data points
-    whitespace = 1.02
+bossesByName = {}
 
-    ax2.plot(x,cdf, label='cdf', color='tab:red')
-    ax2.tick_params(axis='y', labelcolor='tab:red')
-    ax2.set_ylabel('% chance to complete at or before kc', color='tab:red')
-    ax2.set_ylim(bottom=0, top=100 * whitespace)
-    ax.plot(x,pdf, label='pdf', color='tab:blue')
-    ax.set_ylabel('% chance to complete at kc', color='tab:blue')
+def lookupBoss(name, group_size):
+    # every worker builds the bosses it gets once and looks them up by name, so only the name gets send to it
+    if name not in bossesByName:
+        bossesByName[name] = createBoss(name)
+    boss = bossesByName[name]
+    boss.set_groupsize(group_size)
+    return boss
 
+def runJob(spec, workers=1, directory=dataDirectory, engine='auto', dtype='float64', cacheDirectory=None):
+    # returns the time the job took and how it went, see Scheduler.run
+    start = time.time()
     try:
-        ax.tick_params(axis='y', labelcolor='tab:blue')
-        ax.set_ylim(bottom=0, top=max(pdf) * whitespace)
-    
-        if(mode - xcutoff < len(x)):
-            legend.axvline(x=mode, ymax=(max(cdf[mode - xcutoff]/max(cdf), pdf[mode - xcutoff]/max(pdf)) / whitespace), linestyle='--', color="gray", label=f"Mode: {mode} {kc_name}")
-        if(half - xcutoff< len(x)):
-            legend.axvline(x=half, ymax=(max(cdf[half - xcutoff]/max(cdf), pdf[half - xcutoff]/max(pdf)) / whitespace), linestyle='-', color="gray", label=f"Median: {half} {kc_name}")
-        # average is an floating point number
-        if(int(average) - xcutoff < len(x)):
-            legend.axvline(x=average, ymax=(max(cdf[int(average) - xcutoff]/max(cdf), pdf[int(average) - xcutoff]/max(pdf)) / whitespace), linestyle='-.', color="gray", label=f"Mean: {average:.2f} {kc_name}")
-    except Exception as e:
-        print(boss.name, e)
-    
-    ax.set_title(f"Chance to complete {boss.name.replace('_', ' ').capitalize()}")
-    legend.legend(loc='center right')
+        boss = lookupBoss(*spec)
+        boss.workers = workers
+        boss.engine = engine
+        boss.propagationDtype = dtype
+        path, cached = computeCompletion(boss, directory, cache if cacheDirectory is None else ResultCache(cacheDirectory))
+    except Exception:
+        print(spec[0], 'failed')
+        traceback.print_exc()
+        return time.time() - start, 'failed'
+    return time.time() - start, 'cached' if cached else 'computed' if path is not None else 'skipped'
+
+def selectBosses(patterns):
+    # boss names matching any of the patterns, in the order they're registered
+    names = list(bossFactories())
+    selected = [name for name in names if any(fnmatch.fnmatch(name.strip().lower(), pattern.lower()) for pattern in patterns)]
+    unknown = [pattern for pattern in patterns if not any(fnmatch.fnmatch(name.strip().lower(), pattern.lower()) for name in names)]
+    if unknown:
+        raise SystemExit(f"no bosses match {', '.join(unknown)}, use --list to see them")
+    return selected
+
+def parseArguments(argv=None):
+    parser = argparse.ArgumentParser(description='Calculates how many kc it takes to complete the drops of bosses.')
+    parser.add_argument('bosses', nargs='*', default=['*'], help='names or glob patterns of the bosses to run, all of them by default')
+    parser.add_argument('-g', '--group-sizes', nargs='+', type=int, default=[1, 2, 3, 4, 5], help='group sizes to run every boss at')
+    parser.add_argument('-e', '--engine', choices=monster.engines, default='auto', help='how to compute the chains')
+    parser.add_argument('--float32', action='store_true', help='propagate in single precision, half the memory at an error of about 1e-6')
+    parser.add_argument('-o', '--output', default='.', help='directory the data and images are written to')
+    parser.add_argument('--cache', metavar='DIR', help='directory of the result cache, .cache in the output directory by default')
+    parser.add_argument('--timings', metavar='FILE', help='file the scheduler keeps the run times of the bosses in, timings.json in the output directory by default')
+    parser.add_argument('-p', '--processes', type=int, default=pool_size, help='size of the process pools')
+    render = parser.add_mutually_exclusive_group()
+    render.add_argument('--no-render', action='store_true', help="only compute and export the data, don't plot it")
+    render.add_argument('--render-only', action='store_true', help='only plot data that was exported before')
+    parser.add_argument('--list', action='store_true', help='list the names of the bosses and exit')
+    parser.add_argument('--simulate', action='store_true', help='simulate players instead of computing the chains')
+    parser.add_argument('--precision', type=float, default=0.01, help='relative error to simulate the mean and quantiles to')
+    parser.add_argument('--samples', type=int, help='simulate this many players over the process pool instead of simulating until precise')
+    parser.add_argument('--seed', type=int, help='seed of the simulation, the same seed and --processes give the same results')
+    parser.add_argument('--quantiles', nargs='+', type=float, default=[0.5, 0.9, 0.99], help='quantiles to estimate when simulating')
+    parser.add_argument('--trace', metavar='FILE', help='log the time every phase of every boss takes to FILE as json lines')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    arguments = parseArguments(argv)
+    if arguments.list:
+        print('\n'.join(name.strip() for name in bossFactories()))
+        return
 
-    ax.set_xlim(left=x[0], right=x[-1])
+    names = selectBosses(arguments.bosses)
+    if arguments.trace:
+        instrumentation.enable(arguments.trace)
+    dataPath = os.path.join(arguments.output, dataDirectory)
+    specs = [(name, groupSize) for groupSize in arguments.group_sizes for name in names]
+    print(len(specs))
+
+    if arguments.simulate:
+        if arguments.samples:
+            seed = arguments.seed if arguments.seed is not None else np.random.SeedSequence().entropy
+            print(f"seed {seed}")
+        images = os.path.join(arguments.output, 'images')
+        for name, groupSize in specs:
+            boss = lookupBoss(name, groupSize)
+            if arguments.samples:
+                simulate_average_completion(boss, arguments.samples, arguments.processes, seed, not arguments.no_render, images)
+            else:
+                simulate_until_precise(boss, arguments.precision, arguments.quantiles, render=not arguments.no_render, directory=images)
+        return
 
-    plt.savefig(f"images/groupsize{boss.group_size}/{boss.name.strip().lower()}.png", bbox_inches='tight')
-    plt.close()
+    if not arguments.render_only:
+        # the scheduler needs every boss at its group size for its estimates, a boss only has one group size at a time
+        bosses = []
+        for name, groupSize in specs:
+            boss = createBoss(name)
+            boss.set_groupsize(groupSize)
+            boss.engine = arguments.engine
+            bosses.append(boss)
 
+        # doing long bosses first allows the shorter bosses to fill in the 'gaps' after a thread has finished better
+        # leading to shorter execution times. The scheduler predicts how long a boss takes from earlier runs
+        # bosses that would take longer than everything else combined get all processes to themselves
+        cacheDirectory = arguments.cache or os.path.join(arguments.output, '.cache')
+        work = functools.partial(runJob, directory=dataPath, engine=arguments.engine, dtype='float32' if arguments.float32 else 'float64', cacheDirectory=cacheDirectory)
+        failed = Scheduler(arguments.timings or os.path.join(arguments.output, 'timings.json')).run(bosses, work, processes=arguments.processes, parallelWork=work)
+        if arguments.trace:
+            instrumentation.summarize(arguments.trace)
+        if failed:
+            raise SystemExit(f"{len(failed)} jobs failed: {', '.join(f'{name.strip()} (group size {groupSize})' for name, groupSize in failed)}")
+
+    # the render stage only reads the exported data, bosses that couldn't be computed don't have any
+    paths = [completionPath(name, groupSize, dataPath) for name, groupSize in specs]
+    paths = [path for path in dict.fromkeys(paths) if os.path.exists(f"{path}.json")]
+    if paths:
+        writeSummaryTable(paths, os.path.join(dataPath, 'summary.csv'))
+    if not arguments.no_render and paths:
+        from plotting import renderAll
+        renderAll(paths, processes=arguments.processes, directory=os.path.join(arguments.output, 'images'))
 
 
 if __name__ == '__main__':
-    bosses = []
-
-    for i in range(1,6):
-        for boss in allBosses() + optionalBosses():
-            boss.set_groupsize(i)
-            bosses.append(boss)
-
-    # doing long bosses first allows the shorter bosses to fill in the 'gaps' after a thread has finished better
-    # leading to shorter execution times. States is a good indication of how long a boss will take to compute
-    bosses.sort(key=lambda b: b.nStates, reverse = True)
-    print(len(bosses))
-
-    pool = Pool(processes=pool_size)
-    # chunksize 1 ensures the bosses get evaluated rougly in the same order as the bosses array which is good enough
-    pool.map(createCompletionPlot, bosses, chunksize=1)
+    main()
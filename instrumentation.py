@@ -0,0 +1,97 @@
+import json
+import os
+import time
+from collections import defaultdict
+try:
+    import resource
+except ImportError:
+    # not available on windows, the peak memory is left out there
+    resource = None
+
+# Opt in timing of the phases of every boss, written as json lines so the runs of all pool workers end up in one file.
+# Tracing is turned on by setting RSDROPS_TRACE to the file to write to (drop_rolling --trace does that), the workers
+# inherit it from the environment. When it's off a phase only costs an attribute check.
+traceVariable = 'RSDROPS_TRACE'
+logFile = os.environ.get(traceVariable)
+
+
+def enable(filename):
+    global logFile
+    logFile = filename
+    # every run starts a new trace
+    open(filename, 'w').close()
+    # so processes started after this trace as well
+    os.environ[traceVariable] = filename
+
+
+def peakRss():
+    # peak resident memory of this process in MB, over its whole lifetime so pool workers report the most of any job so far
+    if(resource is None):
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def emit(record):
+    # a single write of a short line, appends from different processes don't get interleaved
+    with open(logFile, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+class phase:
+    # Times a phase of computing a boss. The dict it gives can be filled with anything worth logging, like nnz or steps:
+    #     with phase(boss, 'propagate') as fields:
+    #         fields['steps'] = ...
+    def __init__(self, boss, name):
+        self.boss = boss
+        self.name = name
+        self.fields = {}
+
+    def __enter__(self):
+        if(logFile is not None):
+            self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exceptionType, exception, traceback):
+        if(logFile is None):
+            return False
+        record = {
+            'boss': self.boss.name,
+            'group_size': self.boss.group_size,
+            'phase': self.name,
+            'seconds': time.perf_counter() - self.start,
+            'peak_rss_mb': peakRss(),
+            'pid': os.getpid(),
+        }
+        record.update(self.fields)
+        if(exception is not None):
+            record['error'] = repr(exception)
+        emit(record)
+        return False
+
+
+def readTrace(filename):
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(filename, top=10):
+    # time spent in every phase over all bosses and the slowest boss phases
+    records = readTrace(filename)
+    if(not records):
+        return
+
+    perPhase = defaultdict(float)
+    for record in records:
+        perPhase[record['phase']] += record['seconds']
+    print(f"{len(records)} traced phases of {len({(r['boss'], r['group_size']) for r in records})} jobs")
+    for name, seconds in sorted(perPhase.items(), key=lambda item: -item[1]):
+        print(f"  {name:<12} {seconds:10.2f}s")
+
+    print(f"slowest {top}:")
+    for record in sorted(records, key=lambda r: -r['seconds'])[:top]:
+        details = ', '.join(f"{key}: {value}" for key, value in record.items() if key not in ('boss', 'group_size', 'phase', 'seconds', 'pid'))
+        print(f"  {record['seconds']:10.2f}s {record['boss'].strip()} (group size {record['group_size']}) {record['phase']}, {details}")
+
+    errors = [r for r in records if 'error' in r]
+    if(errors):
+        print(f"{len(errors)} phases failed")
@@ -0,0 +1,448 @@
+import math
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from scipy.special import gammaln
+
+
+def occupancies(items, counts):
+    # every way to spread the items over the possible counts
+    if(counts == 1):
+        yield (items,)
+        return
+    for first in range(items, -1, -1):
+        for rest in occupancies(items - first, counts - 1):
+            yield (first,) + rest
+
+
+class ItemGroup:
+    # Items with the same odds on every loot table that we need the same amount of are interchangeable, so instead of
+    # tracking each of them we only track how many of the group have each count. For a single item that's just its count.
+    # items are the ids of the items, their columns in the arrays of the LootModel.
+    # The local states are ordered on the total amount of drops, so a drop always moves to a higher local state
+    # and the first and last local states are having none and having all of the items.
+    def __init__(self, items, amount):
+        self.items = items
+        self.amount = int(amount)
+
+        states = sorted(occupancies(len(items), self.amount + 1), key=lambda o: (sum(count * n for count, n in enumerate(o)), o))
+        self.size = len(states)
+        local = {state: index for index, state in enumerate(states)}
+
+        # transitions between the local states, when one of the n items that have a count of c drops
+        fromState = []
+        toState = []
+        multiplicity = []
+        for index, state in enumerate(states):
+            for count in range(self.amount):
+                if(state[count] == 0):
+                    continue
+                new = list(state)
+                new[count] -= 1
+                new[count + 1] += 1
+                fromState += [index]
+                toState += [local[tuple(new)]]
+                multiplicity += [state[count]]
+
+        self.fromState = np.array(fromState, dtype='int')
+        self.toState = np.array(toState, dtype='int')
+        self.multiplicity = np.array(multiplicity, dtype='int')
+        # transitions are sorted on the state they come from, first[i] is the first transition out of local state i
+        self.exits = np.bincount(self.fromState, minlength=self.size)
+        self.first = np.cumsum(self.exits) - self.exits
+        # amount of items in the group we still need more of in every local state
+        self.missing = np.array([len(items) - state[-1] for state in states], dtype='int')
+        # a single item, or items we need one of each of, only ever move one local state up
+        self.chain = len(self.fromState) == self.size - 1 and bool((self.toState == self.fromState + 1).all())
+
+
+class StateLayout:
+    # mixed radix layout of the states with a dimension for every group of interchangeable items, the first group changes fastest
+    def __init__(self, odds, targets):
+        # odds is loot tables x items, items with the same amount and the same odds on every table get lumped together
+        # in the order they first come up
+        signatures = np.vstack((targets, odds)).T
+        _, first, inverse = np.unique(signatures, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        self.members = [(np.flatnonzero(inverse == group), int(targets[first[group]])) for group in np.argsort(first)]
+        # A group has a local state for every way to spread its items over the counts 0 to amount, and a transition out of
+        # every local state for every count below the amount that still has an item. Counting them combinatorially sizes
+        # the chain without enumerating anything, the groups of clues at higher group sizes would take gigabytes to enumerate.
+        self.shape = tuple(math.comb(len(items) + amount, amount) for items, amount in self.members)
+        self.exits = tuple(amount * (size - math.comb(len(items) + amount - 1, amount - 1)) for (items, amount), size in zip(self.members, self.shape))
+        self.chains = tuple(len(items) == 1 or amount == 1 for items, amount in self.members)
+        self.nStates = math.prod(self.shape)
+        self._groups = None
+        self._states = None
+        self._transitions = {}
+
+    @property
+    def groups(self):
+        # the local states of every group, only enumerated once an engine builds the chain
+        if(self._groups is None):
+            self._groups = [ItemGroup(items, amount) for items, amount in self.members]
+        return self._groups
+
+    @property
+    def strides(self):
+        return np.cumprod((1,) + self.shape)[:-1].astype('int')
+
+    def states(self):
+        # unravel every state index at once, only done once and shared between the loot tables
+        if(self._states is None):
+            self._states = (np.arange(self.nStates)[:, None] // self.strides) % np.array(self.shape, dtype='int')
+        return self._states
+
+    def transitions(self, groupIndex):
+        # every state gets a row for each transition out of its local state in this group,
+        # only states where we don't have enough of the items yet have any.
+        # returns the rows, columns and multiplicity of every transition and the amount of items still missing in every state.
+        # They don't depend on the odds, so they're worked out once and shared by every loot table the group is on
+        if(groupIndex in self._transitions):
+            return self._transitions[groupIndex]
+        group = self.groups[groupIndex]
+        local = self.states()[:, groupIndex]
+        exits = group.exits[local]
+        rows = np.repeat(np.arange(self.nStates), exits)
+        transition = np.repeat(group.first[local], exits) + np.arange(len(rows)) - np.repeat(np.cumsum(exits) - exits, exits)
+        cols = rows + (group.toState[transition] - group.fromState[transition]) * self.strides[groupIndex]
+        self._transitions[groupIndex] = (rows, cols, group.multiplicity[transition], group.missing[local])
+        return self._transitions[groupIndex]
+
+
+class ChainEstimate:
+    # Predicts how big the chain of a boss gets and what computing it costs with every engine, without building anything.
+    # Work is in element operations (one multiply-add of a nonzero), memory in bytes.
+    bytesPerNonzero = 12
+    # every numpy call of the matrix free operator costs about as much as this many element operations
+    callOverhead = 1000
+    # and every sparse mat-vec about as much as this many nonzeros
+    matvecOverhead = 5000
+
+    def __init__(self, tables, layout, targets, threshold=0.99999, samples=100000):
+        # tables is the odds of the LootModel, loot tables x items
+        self.nStates = layout.nStates
+        members = layout.members
+
+        # transitions of a group over all states, its local transitions for every combination of the other groups
+        moves = [self.nStates // size * exits for size, exits in zip(layout.shape, layout.exits)]
+        self.tableNnz = []
+        matrixFree = 0
+        for odds in tables:
+            onTable = [(axis, move) for axis, ((items, _), move) in enumerate(zip(members, moves)) if odds[items[0]] > 0]
+            self.tableNnz += [self.nStates + sum(move for _, move in onTable)]
+            # a copy of the state and a multiply, subtract and add for every moved slice
+            matrixFree += 2 * self.nStates
+            for axis, move in onTable:
+                shifts = 1 if layout.chains[axis] else layout.exits[axis]
+                matrixFree += 3 * move + shifts * self.callOverhead
+
+        # the rarest drop we need decides how far the cdf has to go, the chance to still miss it decays as (1 - p)^kc
+        rates = tables.sum(axis=0)
+        rarest = int(np.argmin(rates)) if len(rates) else None
+        if(rarest is None or rates[rarest] <= 0):
+            self.length = 0
+        else:
+            self.length = int((targets[rarest] + math.log(len(targets)) - math.log(1 - threshold)) / rates[rarest])
+
+        subsets = math.prod(len(items) + 1 for items, _ in members)
+        vector = 8 * self.nStates
+        # at most an eigenvalue for every subset of the items we're still missing, each with a power of kc per drop needed
+        terms = min(subsets, self.nStates) * int(targets.sum())
+        self.work = {
+            'analytic': subsets * self.length,
+            # the tables are applied one after another, never multiplied together
+            'sparse': (sum(self.tableNnz) + len(tables) * (2 * self.nStates + self.matvecOverhead)) * self.length,
+            'matrix-free': matrixFree * self.length,
+            # solved twice for every state, then evaluated at every kc
+            'spectral': 2 * sum(self.tableNnz) * terms + terms * self.length,
+            # the simulation jumps from drop to drop, every player gets exactly the drops it needs
+            'monte-carlo': samples * int(targets.sum()) * (len(tables) + 1) * len(targets) * 10,
+        }
+        self.memory = {
+            'analytic': 8 * subsets * 4,
+            # building the table matrices takes a few arrays per nonzero, more than the matrices themselves
+            'sparse': max(5 * 8 * max(self.tableNnz, default=0), self.bytesPerNonzero * sum(self.tableNnz)) + 4 * vector,
+            'matrix-free': 4 * vector,
+            'spectral': vector * terms + self.bytesPerNonzero * sum(self.tableNnz),
+            'monte-carlo': 2 * 8 * samples * len(targets),
+        }
+
+
+class MatrixFreeOperator:
+    # Applies the transition of one kill to a probability vector straight from the mixed radix state layout
+    # without ever materializing the matrix. Getting an item moves mass along its group's axis, for that axis the vector
+    # is viewed as (states of the later groups, the group's local states, states of the earlier groups) since the first
+    # group changes fastest (like monster.indexToState), which keeps the moved slices contiguous blocks.
+    # Memory is a couple of state vectors no matter how many items or loot tables there are.
+    def __init__(self, tables, layout, dtype='float64'):
+        # tables is the odds of the LootModel, loot tables x items. The weights are in the dtype of the state it gets
+        # applied to, a float64 weight would turn every product with a float32 state into a float64 temporary
+        self.dtype = np.dtype(dtype)
+        self.shape = layout.shape
+        self.nStates = layout.nStates
+
+        # for every loot table the moves it can cause, with the view of the state and the local states mass moves from and to
+        self.tables = []
+        for odds in tables:
+            shifts = []
+            for axis, group in enumerate(layout.groups):
+                if(odds[group.items[0]] <= 0):
+                    continue
+                inner = int(layout.strides[axis])
+                view = (self.nStates // (inner * group.size), group.size, inner)
+                if(group.chain):
+                    # everything that doesn't have all of the group yet shifts one local state up at once,
+                    # weighted by how many of its items it's still missing. Clues have groups of over a hundred items
+                    weights = (odds[group.items[0]] * group.multiplicity).reshape(1, -1, 1).astype(self.dtype)
+                    shifts += [(weights, view, slice(0, -1), slice(1, None))]
+                    continue
+                for fromState, toState, multiplicity in zip(group.fromState, group.toState, group.multiplicity):
+                    shifts += [(self.dtype.type(odds[group.items[0]] * multiplicity), view, slice(fromState, fromState + 1), slice(toState, toState + 1))]
+            self.tables += [shifts]
+
+    def __call__(self, state):
+        # rolling the tables one after the other is the same as multiplying by the product of their matrices
+        current = state
+        for shifts in self.tables:
+            new = current.copy()
+            for odds, view, before, after in shifts:
+                moved = odds * current.reshape(view)[:, before]
+                new.reshape(view)[:, before] -= moved
+                new.reshape(view)[:, after] += moved
+            current = new
+
+        return current
+
+
+class CouponCollector:
+    # Needing one of each item from a single loot table is the coupon collector problem. The chance to have every item
+    # at kc n is the sum over every subset S of the items of (-1)^|S| (1 - p_S)^n (inclusion-exclusion), no matrix needed.
+    # Items with the same odds give the same terms so the subsets are counted per group of interchangeable items.
+    def __init__(self, groups):
+        odds = np.array([p for p, _ in groups])
+        sizes = np.array([size for _, size in groups], dtype='int')
+
+        # every combination of how many items of each group are in the subset
+        counts = np.stack(np.meshgrid(*[np.arange(size + 1) for size in sizes], indexing='ij'), axis=-1).reshape(-1, len(sizes))
+        self.subsetOdds = counts @ odds
+        self.weights = (-1.0) ** counts.sum(axis=1) * np.prod([[math.comb(size, count) for size, count in zip(sizes, row)] for row in counts], axis=1)
+        self.logMiss = np.log1p(-np.minimum(self.subsetOdds, 1))
+        # 1 - cdf(n) <= sum over the items of (1 - p_i)^n, used to find how far the cdf has to go
+        self.odds = np.repeat(odds, sizes)
+
+    def cdf(self, kc):
+        # evaluated in blocks so the subsets x kc matrix stays small
+        kc = np.asarray(kc, dtype='float')
+        block = max(1, 2 ** 22 // len(self.weights))
+        return np.concatenate([self.weights @ np.exp(np.outer(self.logMiss, kc[i:i + block])) for i in range(0, len(kc), block)])
+
+    def propagateCdf(self, threshold=0.99999):
+        length = int(np.ceil(np.log((1 - threshold) / len(self.odds)) / np.log1p(-self.odds.min()))) + 1
+        y = self.cdf(np.arange(1, length + 1))
+        return y[:int(np.argmax(y >= threshold)) + 1]
+
+
+class PhaseType:
+    # The cdf of an absorbing chain as a sum of geometric terms, to evaluate it at any kc without propagating to it.
+    # Drops only move us to higher states, so the transition matrix is upper triangular and its eigenvalues are its
+    # diagonal: the chance to get nothing we still need, of which there's only a handful of distinct ones.
+    # The chance g_i(n) to have completed within n kc starting from state i follows g_i(n+1) = d_i g_i(n) + sum P_ij g_j(n),
+    # that's solved from the last state back with g_i as a combination of C(n, k) l^(n-k) for every distinct eigenvalue l.
+    # One more kc maps that onto l C(n, k) l^(n-k) + C(n, k-1) l^(n-k+1), a Jordan block, so repeated eigenvalues
+    # (needing more than one of an item) just get higher k. Near-equal eigenvalues give huge terms that cancel,
+    # evaluate estimates the error alongside the cdf so callers can fall back to propagating.
+    # eigenvalues closer than this are the same one, they only differ by how their row totals got rounded
+    sameEigenvalue = 1e-12
+    # cdf errors above this are too much
+    tolerance = 1e-9
+    # amount of coefficients (states x eigenvalues x powers of kc) the solve may keep around
+    maxCoefficients = 2 ** 24
+
+    def __init__(self, matrix):
+        matrix = csr_matrix(matrix)
+        nStates = matrix.shape[0]
+        diagonal = matrix.diagonal()
+        ordered = np.sort(diagonal)
+        first = np.concatenate(([True], np.diff(ordered) > self.sameEigenvalue))
+        self.eigenvalues = ordered[first]
+        eigenvalue = np.searchsorted(self.eigenvalues, diagonal, side='right') - 1
+        moves = (matrix - diags(diagonal)).tocsr()
+        moves.eliminate_zeros()
+
+        # the highest power of kc an eigenvalue gets is how often it's on a single path through the chain
+        visits = np.zeros((nStates, len(self.eigenvalues)), dtype='int')
+        for i in reversed(range(nStates)):
+            successors = moves.indices[moves.indptr[i]:moves.indptr[i + 1]]
+            if(len(successors)):
+                visits[i] = visits[successors].max(axis=0)
+            visits[i, eigenvalue[i]] += 1
+        powers = int(visits[0].max())
+        if(nStates * len(self.eigenvalues) * powers > self.maxCoefficients):
+            raise ValueError(f"a chain of {nStates} states with {len(self.eigenvalues)} eigenvalues has too many terms")
+
+        # How much rounding the inputs changes the result is what rounding errors in the solve do to it as well,
+        # so the chain is solved a second time with every odds perturbed by a few roundings to estimate the error.
+        # That solve takes the other end of every group of eigenvalues that counted as the same one.
+        rng = np.random.default_rng(0)
+        perturbation = 4 * np.finfo('float').eps
+        self.coefficients = self.solve(moves, moves.data, self.eigenvalues, eigenvalue, powers)
+        self.perturbedEigenvalues = ordered[np.concatenate((first[1:], [True]))] * (1 + perturbation * rng.uniform(-1, 1, len(self.eigenvalues)))
+        self.perturbedEigenvalues[-1] = 1
+        self.perturbed = self.solve(moves, moves.data * (1 + perturbation * rng.uniform(-1, 1, moves.nnz)), self.perturbedEigenvalues, eigenvalue, powers)
+
+    def solve(self, moves, data, eigenvalues, eigenvalue, powers):
+        # the coefficients of g_0, starting at the last state and going back
+        nStates = moves.shape[0]
+        coefficients = np.zeros((nStates, len(eigenvalues), powers))
+        for i in reversed(range(nStates)):
+            start, stop = moves.indptr[i], moves.indptr[i + 1]
+            b = np.tensordot(data[start:stop], coefficients[moves.indices[start:stop]], axes=1)
+
+            own = eigenvalue[i]
+            difference = eigenvalues - eigenvalues[own]
+            difference[own] = 1
+            a = coefficients[i]
+            a[:, -1] = b[:, -1] / difference
+            for k in reversed(range(powers - 1)):
+                a[:, k] = (b[:, k] - a[:, k + 1]) / difference
+            # our own eigenvalue picks up a power of kc, its constant term makes g_i(0) right
+            a[own, 1:] = b[own, :-1]
+            a[own, 0] = 0
+            a[own, 0] = (i == nStates - 1) - a[:, 0].sum()
+
+        return coefficients[0]
+
+    def evaluate(self, kc):
+        # the cdf at every kc and an estimate of its error
+        kc = np.asarray(kc, dtype='float')
+        block = max(1, 2 ** 22 // self.coefficients.size)
+        cdf = np.empty(len(kc))
+        error = np.empty(len(kc))
+        for i in range(0, len(kc), block):
+            cdf[i:i + block] = (self.basis(kc[i:i + block], self.eigenvalues) * self.coefficients).sum(axis=(1, 2))
+            error[i:i + block] = np.abs((self.basis(kc[i:i + block], self.perturbedEigenvalues) * self.perturbed).sum(axis=(1, 2)) - cdf[i:i + block])
+        # the terms can round to just outside of a probability
+        return np.clip(cdf, 0, 1), error
+
+    def basis(self, kc, eigenvalues):
+        # C(n, k) l^(n-k) for every kc, eigenvalue and power, zero when k > n
+        n = kc[:, None, None]
+        k = np.arange(self.coefficients.shape[1])
+        power = n - k
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logLambda = np.where(power == 0, 0, power * np.log(eigenvalues)[:, None])
+            logBasis = gammaln(n + 1) - gammaln(k + 1) - gammaln(power + 1) + logLambda
+            return np.where(power >= 0, np.exp(logBasis), 0)
+
+    def propagateCdf(self, threshold=0.99999):
+        # None when the terms cancel too much to get the cdf up to the threshold accurately
+        length = 1
+        while(True):
+            cdf, error = self.evaluate([length])
+            if(error[0] > self.tolerance):
+                return None
+            if(cdf[0] >= threshold):
+                break
+            length *= 2
+        y, error = self.evaluate(np.arange(1, length + 1))
+        if(error.max() > self.tolerance):
+            return None
+        return y[:int(np.argmax(y >= threshold)) + 1]
+
+
+class OddsSweep:
+    # Propagates many settings of the odds of the same boss together, like chambers_of_xeric at different points.
+    # Which states a drop moves between only depends on which items are on a table, not on their odds, so the index
+    # structure of every table's transition matrix is built once and each setting only swaps in its own data array.
+    # All settings are propagated together as one block of states x settings.
+    def __init__(self, settings, targets):
+        # the odds of every setting (settings x loot tables x items), each setting has the same items on the same tables
+        settings = np.asarray(settings, dtype='float')
+        columns = settings.transpose(1, 0, 2)
+        # only lump items that are interchangeable in every setting
+        self.layout = StateLayout(settings.reshape(-1, len(targets)), targets)
+        self.nStates = self.layout.nStates
+        self.nSettings = len(settings)
+        index = np.arange(self.nStates)
+
+        self.tables = []
+        for column in columns:
+            rowIndex = []
+            colIndex = []
+            groupIndex = []
+            multiplicity = []
+            odds = []
+            missing = []
+            for group, items in enumerate(self.layout.groups):
+                if(column[0, items.items[0]] <= 0):
+                    continue
+                rows, cols, groupMultiplicity, groupMissing = self.layout.transitions(group)
+                # transposed, we propagate column vectors
+                rowIndex += [cols]
+                colIndex += [rows]
+                groupIndex += [np.full(len(rows), len(odds))]
+                multiplicity += [groupMultiplicity]
+                missing += [groupMissing]
+                odds += [column[:, items.items[0]]]
+
+            # the diagonal, its group is -1 which points at an extra row of zero odds
+            rowIndex += [index]
+            colIndex += [index]
+            groupIndex += [np.full(self.nStates, -1)]
+            multiplicity += [np.zeros(self.nStates, dtype='int')]
+
+            rowIndex = np.concatenate(rowIndex)
+            colIndex = np.concatenate(colIndex)
+            order = np.lexsort((colIndex, rowIndex))
+            indptr = np.concatenate(([0], np.cumsum(np.bincount(rowIndex, minlength=self.nStates))))
+
+            # the data of every setting, nonzeros x settings
+            odds = np.concatenate((np.array(odds).reshape(len(missing), self.nSettings), np.zeros((1, self.nSettings))))
+            data = np.concatenate(multiplicity)[:, None] * odds[np.concatenate(groupIndex)]
+            diagonal = np.concatenate(groupIndex) == -1
+            data[diagonal] = 1 - np.array(missing, dtype='float').reshape(len(missing), self.nStates).T @ odds[:-1]
+
+            self.tables += [(indptr, colIndex[order], data[order])]
+
+    def block(self, settings):
+        # block diagonal matrices of the given settings for every table, settings are laid out one after the other
+        blocks = []
+        for indptr, indices, data in self.tables:
+            nnz = len(indices)
+            offsets = np.arange(len(settings))[:, None]
+            blockIndices = (indices + offsets * self.nStates).ravel()
+            blockIndptr = np.concatenate(((indptr[:-1] + offsets * nnz).ravel(), [nnz * len(settings)]))
+            blocks += [csr_matrix((data[:, settings].T.ravel(), blockIndices, blockIndptr), shape=(self.nStates * len(settings),) * 2)]
+        return blocks
+
+    def propagateCdfs(self, threshold=0.99999):
+        # returns the cdf of every setting, each up to the kc it reaches the threshold
+        settings = np.arange(self.nSettings)
+        blocks = self.block(settings)
+        state = np.zeros((self.nSettings, self.nStates))
+        state[:, 0] = 1
+        state = state.ravel()
+        lengths = np.zeros(self.nSettings, dtype='int')
+
+        y = np.empty((1024, self.nSettings))
+        kc = 0
+        while((lengths == 0).any()):
+            if(kc == len(y)):
+                y = np.concatenate((y, np.empty(y.shape)))
+            for block in blocks:
+                state = block @ state
+            final = state[self.nStates - 1::self.nStates]
+            y[kc, settings] = final
+            kc += 1
+
+            done = (final >= threshold) & (lengths[settings] == 0)
+            lengths[settings[done]] = kc
+
+            # rebuild the block without the finished settings once they're half of it
+            finished = lengths[settings] > 0
+            if(finished.sum() * 2 >= len(settings)):
+                settings = settings[~finished]
+                state = state.reshape(-1, self.nStates)[~finished].ravel()
+                blocks = self.block(settings)
+
+        return [y[:length, setting] for setting, length in enumerate(lengths)]
@@ -0,0 +1,45 @@
+import hashlib
+import numpy as np
+
+
+class LootModel:
+    # The loot of a boss compiled into arrays once, what the markov builders, the simulators and the pool workers work from
+    # instead of the dicts of a monster. An item's id is its column, items holds the name of every id in the order of
+    # loot_amount (only the items we need any of). odds has a row for every loot table a kill rolls with 0 for items that
+    # aren't on it and targets is the amount we need of every item. The states of the chain are laid out by the
+    # StateLayout built from odds and targets, which lumps interchangeable items. It can't be changed after it's built,
+    # so it's hashed once on its contents and pickling it only sends the arrays and a few strings.
+    __slots__ = ('name', 'kc_name', 'group_size', 'items', 'ids', 'odds', 'targets', 'key')
+
+    def __init__(self, name, kc_name, group_size, items, odds, targets):
+        items = tuple(items)
+        odds = np.ascontiguousarray(odds, dtype='float').reshape(len(odds), len(items))
+        targets = np.ascontiguousarray(targets, dtype='int')
+        ids = np.arange(len(items))
+        for array in (ids, odds, targets):
+            array.flags.writeable = False
+
+        digest = hashlib.sha256()
+        digest.update('\0'.join(items).encode())
+        digest.update(np.array(odds.shape).tobytes())
+        digest.update(odds.tobytes())
+        digest.update(targets.tobytes())
+
+        values = (name, kc_name, group_size, items, ids, odds, targets, digest.hexdigest())
+        for slot, value in zip(self.__slots__, values):
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a LootModel can't be changed, build a new one")
+
+    def __reduce__(self):
+        return (LootModel, (self.name, self.kc_name, self.group_size, self.items, self.odds, self.targets))
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, LootModel) and self.key == other.key
+
+    def __repr__(self):
+        return f"LootModel({self.name!r}, {len(self.items)} items, {len(self.odds)} loot tables)"
@@ -0,0 +1,116 @@
+import numpy as np
+from multiprocessing import Barrier, Process
+from multiprocessing.shared_memory import SharedMemory
+
+
+def renormalization(buffer, completed):
+    # what the transient states have to be scaled by to put back the mass rounding lost or added
+    mass = completed + float(buffer[:-1].sum(dtype='float64'))
+    return (1 - completed) / (mass - completed), abs(mass - 1)
+
+
+def propagateRows(name, nStates, dtype, blocks, start, stop, barrier, threshold, renormalizeEvery):
+    # worker side: applies its rows of every transition factor, the vectors live in shared memory
+    memory = SharedMemory(name=name)
+    buffers = np.ndarray((2, nStates), dtype=dtype, buffer=memory.buf)
+    phase = 0
+    kc = 0
+    completed = 0.0
+    scale = 1.0
+    try:
+        while True:
+            for block in blocks:
+                buffers[(phase + 1) % 2, start:stop] = scale * (block @ buffers[phase % 2])
+                scale = 1.0
+                phase += 1
+                barrier.wait()
+                # every process sums the same completed mass after the barrier so they all stop at the same kc
+                completed += float(buffers[phase % 2, nStates - 1])
+
+            if(completed >= threshold):
+                break
+            kc += 1
+            if(renormalizeEvery and kc % renormalizeEvery == 0):
+                # every process computes the same scale from the same vector and applies it to its rows of the next one
+                scale, _ = renormalization(buffers[phase % 2], completed)
+    except BaseException:
+        # don't leave the other processes waiting for us
+        barrier.abort()
+        raise
+    finally:
+        del buffers
+        memory.close()
+
+
+class ParallelPropagator:
+    # Propagates a single large chain over multiple processes. The rows of the (transposed) transition matrices are split
+    # into blocks with about the same amount of nonzeros, every worker computes its block of the new state vector.
+    # Both the current and the new vector are in shared memory and the workers synchronize once for every factor they
+    # apply, so once per kc when the chain is a single matrix.
+    # The completed state keeps its mass forever, so its diagonal is left out: the last entry of the vector is then only the
+    # mass that completed during a factor, which every process sums up in float64. That keeps a float32 cdf from getting
+    # rounded to float32 close to 1, the same thing the serial propagation does.
+    def __init__(self, factors, workers, dtype='float64', renormalizeEvery=0):
+        # factors are transposed transition matrices, applied in order every kc
+        self.dtype = np.dtype(dtype)
+        self.factors = []
+        for factor in factors:
+            factor = factor.tocsr().astype(self.dtype)
+            factor[factor.shape[0] - 1, factor.shape[0] - 1] = 0
+            factor.eliminate_zeros()
+            self.factors += [factor]
+        self.nStates = self.factors[0].shape[0]
+        # kc between renormalizations of the mass, 0 never renormalizes
+        self.renormalizeEvery = renormalizeEvery
+        # the largest distance of the total mass from 1 seen while propagating
+        self.drift = None
+        self.workers = max(1, min(workers, self.nStates))
+
+        nonzeros = sum(factor.indptr for factor in self.factors)
+        self.bounds = np.searchsorted(nonzeros, np.linspace(0, nonzeros[-1], self.workers + 1))
+        self.bounds[0] = 0
+        self.bounds[-1] = self.nStates
+
+    def propagateCdf(self, threshold=0.99999):
+        memory = SharedMemory(create=True, size=2 * self.nStates * self.dtype.itemsize)
+        buffers = np.ndarray((2, self.nStates), dtype=self.dtype, buffer=memory.buf)
+        buffers[:] = 0
+        buffers[0, 0] = 1
+
+        barrier = Barrier(self.workers + 1)
+        processes = []
+        for start, stop in zip(self.bounds[:-1], self.bounds[1:]):
+            blocks = [factor[start:stop] for factor in self.factors]
+            processes += [Process(target=propagateRows, args=(memory.name, self.nStates, self.dtype, blocks, start, stop, barrier, threshold, self.renormalizeEvery))]
+        for process in processes:
+            process.start()
+
+        try:
+            y = np.empty(1024)
+            kc = 0
+            phase = 0
+            completed = 0.0
+            drift = 0.0
+            while(kc == 0 or y[kc - 1] < threshold):
+                if(kc == len(y)):
+                    y = np.concatenate((y, np.empty(len(y))))
+                for _ in self.factors:
+                    barrier.wait()
+                    phase += 1
+                    completed += float(buffers[phase % 2, self.nStates - 1])
+                y[kc] = completed
+                kc += 1
+                if(self.renormalizeEvery and kc % self.renormalizeEvery == 0):
+                    drift = max(drift, renormalization(buffers[phase % 2], completed)[1])
+            self.drift = max(drift, renormalization(buffers[phase % 2], completed)[1])
+        except BaseException:
+            barrier.abort()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+            del buffers
+            memory.close()
+            memory.unlink()
+
+        return y[:kc]
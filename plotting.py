@@ -0,0 +1,106 @@
+import os
+from multiprocessing import Pool
+import matplotlib
+matplotlib.use('agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from results import readCompletion
+from simulation import histogram_stats
+
+imageDirectory = 'images'
+
+
+def imagePath(summary, directory=imageDirectory):
+    return os.path.join(directory, f"groupsize{summary['group_size']}", f"{summary['name'].strip().lower()}.png")
+
+
+def renderCompletionPlot(path, directory=imageDirectory):
+    # draws the cdf and pdf of a boss from the files the compute stage wrote
+    summary, x, cdf, pdf = readCompletion(path)
+    mode, half, average, xcutoff = summary['mode'], summary['median'], summary['mean'], summary['cutoff']
+
+    lootstring = ''
+    count = 0
+    items = [f"{item.title()}: {amount}" for item, amount in summary['loot'].items()]
+    for it,part in enumerate(items):
+        lootstring = f"{lootstring} {part}{', ' if it < len(items) - 1 else ''}"
+        count += len(part)
+        if count >= 70:
+            lootstring = f"{lootstring}\n"
+            count = 0
+
+    _, (ax) = plt.subplots()
+    kc_name = summary['kc_name']
+    #axis labels
+    ax.set_xlabel(f"{kc_name}\n\n{kc_name} it takes to get:\n {lootstring}")
+
+    ax2 = ax.twinx()
+    legend = ax.twinx()
+    legend.axes.yaxis.set_visible(False)
+
+    #data points
+    whitespace = 1.02
+
+    ax2.plot(x,cdf, label='cdf', color='tab:red')
+    ax2.tick_params(axis='y', labelcolor='tab:red')
+    ax2.set_ylabel('% chance to complete at or before kc', color='tab:red')
+    ax2.set_ylim(bottom=0, top=100 * whitespace)
+    ax.plot(x,pdf, label='pdf', color='tab:blue')
+    ax.set_ylabel('% chance to complete at kc', color='tab:blue')
+
+    try:
+        ax.tick_params(axis='y', labelcolor='tab:blue')
+        ax.set_ylim(bottom=0, top=max(pdf) * whitespace)
+
+        if(mode - xcutoff < len(x)):
+            legend.axvline(x=mode, ymax=(max(cdf[mode - xcutoff]/max(cdf), pdf[mode - xcutoff]/max(pdf)) / whitespace), linestyle='--', color="gray", label=f"Mode: {mode} {kc_name}")
+        if(half - xcutoff< len(x)):
+            legend.axvline(x=half, ymax=(max(cdf[half - xcutoff]/max(cdf), pdf[half - xcutoff]/max(pdf)) / whitespace), linestyle='-', color="gray", label=f"Median: {half} {kc_name}")
+        # average is an floating point number
+        if(int(average) - xcutoff < len(x)):
+            legend.axvline(x=average, ymax=(max(cdf[int(average) - xcutoff]/max(cdf), pdf[int(average) - xcutoff]/max(pdf)) / whitespace), linestyle='-.', color="gray", label=f"Mean: {average:.2f} {kc_name}")
+    except Exception as e:
+        print(summary['name'], e)
+
+    ax.set_title(f"Chance to complete {summary['name'].replace('_', ' ').capitalize()}")
+    legend.legend(loc='center right')
+
+    ax.set_xlim(left=x[0], right=x[-1])
+
+    image = imagePath(summary, directory)
+    os.makedirs(os.path.dirname(image), exist_ok=True)
+    plt.savefig(image, bbox_inches='tight')
+    plt.close()
+    return image
+
+
+def renderSimulation(name, histogram, directory=imageDirectory):
+    # histogram of the kc at which the simulated players completed
+    average_completion, half, _, _ = histogram_stats(histogram)
+    x = np.flatnonzero(histogram)
+    y = histogram[x]
+
+    _, ax = plt.subplots()
+    #axis labels
+    ax.set_ylabel('number of completions')
+    ax.set_xlabel('kc')
+
+    #data points
+    ax.plot(x,y, 'o', markersize=1, label='boss completion')
+
+    #lines at relevant points
+    ax.axvline(x=half, color='r', label="50% of people completed at {} kc".format(half))
+    ax.axvline(x=average_completion, color='g', label="average completion at {} kc".format(int(average_completion)+1))
+
+    #title
+    ax.set_title("{} completions of {}".format(histogram.sum(), name))
+    ax.legend()
+    os.makedirs(directory, exist_ok=True)
+    plt.savefig(os.path.join(directory, "{}_{}.pdf".format(histogram.sum(), name)), bbox_inches='tight')
+    plt.close()
+
+
+def renderAll(paths, processes=None, directory=imageDirectory):
+    # the render stage, only needs the exported data so restyling the plots doesn't recompute anything
+    with Pool(processes=processes) as pool:
+        return pool.starmap(renderCompletionPlot, [(path, directory) for path in paths])
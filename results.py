@@ -0,0 +1,60 @@
+import csv
+import json
+import os
+import numpy as np
+
+# Output of the compute stage. Every boss gets an npz file with its distribution and a json file with its summary,
+# the render stage and anything else that wants the numbers (dashboards, spreadsheets) only reads these files.
+dataDirectory = 'data'
+summaryFields = ['name', 'group_size', 'kc_name', 'mode', 'median', 'mean', 'cutoff', 'max_kc', 'loot']
+
+
+def completionPath(name, group_size, directory=dataDirectory):
+    # path of a boss's files without the extension
+    return os.path.join(directory, f"groupsize{group_size}", name.strip().lower())
+
+
+def writeCompletion(boss, graph, directory=dataDirectory):
+    (x, cdf, pdf, mode, median, mean, cutoff) = graph
+    path = completionPath(boss.name, boss.group_size, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(f"{path}.npz", x=x, cdf=cdf, pdf=pdf)
+
+    summary = {
+        'name': boss.name,
+        'group_size': boss.group_size,
+        'kc_name': boss.kc_name,
+        'mode': int(mode),
+        'median': int(median),
+        'mean': float(mean),
+        'cutoff': int(cutoff),
+        'max_kc': int(x[-1]),
+        'loot': {item: amount for item, amount in boss.loot_amount.items() if amount > 0},
+    }
+    with open(f"{path}.json", 'w') as f:
+        json.dump(summary, f, indent=1)
+    return path
+
+
+def readCompletion(path):
+    # returns the summary and the x, cdf and pdf arrays written by writeCompletion
+    with open(f"{path}.json") as f:
+        summary = json.load(f)
+    with np.load(f"{path}.npz") as data:
+        return summary, data['x'], data['cdf'], data['pdf']
+
+
+def readSummary(path):
+    with open(f"{path}.json") as f:
+        return json.load(f)
+
+
+def writeSummaryTable(paths, filename):
+    # one row per boss and group size with the stats of every computed boss
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=summaryFields)
+        writer.writeheader()
+        for path in paths:
+            summary = readSummary(path)
+            summary['loot'] = ', '.join(f"{item}: {amount}" for item, amount in summary['loot'].items())
+            writer.writerow(summary)
@@ -0,0 +1,106 @@
+import json
+import os
+import statistics
+import time
+from multiprocessing import Pool
+
+
+class Scheduler:
+    # Runs boss jobs longest first over a process pool. The cost of a job is predicted from its recorded time in earlier
+    # runs, or from a model (propagation length x work per kc) scaled by how well that model predicted the recorded jobs.
+    # Idle workers take the next longest job from the shared queue, so the short jobs fill up the gaps at the end.
+    # Workers only get a (name, group size) spec and build the boss themselves instead of getting a pickled monster.
+    # engines that can spread a single chain over processes, the others compute it in one process anyway
+    parallelEngines = ('sparse', 'spectral')
+    # chains with fewer nonzeros than this spend more time waiting on the barrier every kc than multiplying
+    parallelNnz = 1000000
+
+    def __init__(self, historyFile='timings.json'):
+        self.historyFile = historyFile
+        self.history = {}
+        if(os.path.exists(historyFile)):
+            with open(historyFile) as f:
+                self.history = json.load(f)
+
+    def key(self, boss):
+        # the run time belongs to the loot the boss is computed from and the engine it uses, when its rates change
+        # (or it gets another engine) the old time says nothing about it anymore. The name is only there to read the file
+        engine, _ = self.plan(boss)
+        return f"{boss.name}|{boss.group_size}|{engine}|{boss.model().key[:16]}"
+
+    def plan(self, boss):
+        # the engine the boss is going to use and the estimate of its chain, None when there's nothing to compute
+        if(not len(boss.model().items)):
+            return None, None
+        estimate = boss.estimateChain()
+        engine, _ = boss.chooseEngine(estimate)
+        return engine, estimate
+
+    def estimate(self, boss):
+        # model of the work to compute a boss, not in any unit
+        engine, estimate = self.plan(boss)
+        return 0 if engine is None else estimate.work[engine]
+
+    def splittable(self, boss):
+        # whether spreading the chain of the boss over processes pays off
+        engine, estimate = self.plan(boss)
+        return engine in self.parallelEngines and sum(estimate.tableNnz) >= self.parallelNnz
+
+    def scale(self, bosses):
+        # how many seconds the model's unit is, from the jobs we have a recorded time for
+        ratios = [self.history[self.key(boss)] / self.estimate(boss) for boss in bosses if self.key(boss) in self.history and self.estimate(boss) > 0]
+        return statistics.median(ratios) if ratios else 1
+
+    def predict(self, boss, scale=1):
+        if(self.key(boss) in self.history):
+            return self.history[self.key(boss)]
+        return self.estimate(boss) * scale
+
+    def record(self, key, seconds):
+        # smooth the recorded times a bit, run times vary with whatever else runs on the machine
+        self.history[key] = seconds if key not in self.history else (self.history[key] + seconds) / 2
+
+    def save(self):
+        with open(self.historyFile, 'w') as f:
+            json.dump(self.history, f, indent=1, sort_keys=True)
+
+    def run(self, bosses, work, processes=None, initializer=None, parallelWork=None):
+        # work gets a (name, group size) spec and has to return the time it took and how the job went: 'computed',
+        # 'cached', 'skipped' or 'failed'. Only the times of computed jobs are recorded, loading a result from the cache
+        # says nothing about how long computing it takes. Jobs that are predicted to take more than an even share of the
+        # total on their own are run one by one in this process through parallelWork instead, which gets the amount of
+        # processes it can spread the boss over. Only big chains of an engine that can be split go there, everything else
+        # (small chains, matrix free, simulations) is better off taking one worker of the pool.
+        # Returns the specs of the jobs that failed.
+        processes = processes or os.cpu_count()
+        jobs = {self.key(boss): boss for boss in bosses}
+        scale = self.scale(jobs.values())
+        order = sorted(jobs.values(), key=lambda boss: self.predict(boss, scale), reverse=True)
+        specs = [(boss.name, boss.group_size) for boss in order]
+        keys = {spec: self.key(boss) for spec, boss in zip(specs, order)}
+        total = len(specs)
+        failed = []
+
+        def finish(spec, result):
+            seconds, outcome = result
+            if(outcome == 'computed'):
+                self.record(keys[spec], seconds)
+                self.save()
+            elif(outcome == 'failed'):
+                failed.append(spec)
+
+        start = time.time()
+        if(parallelWork is not None and processes > 1):
+            share = sum(self.predict(boss, scale) for boss in order) / processes
+            large = [spec for spec, boss in zip(specs, order) if self.predict(boss, scale) > share and self.splittable(boss)]
+            for spec in large:
+                finish(spec, parallelWork(spec, processes))
+            specs = [spec for spec in specs if spec not in large]
+
+        with Pool(processes=processes, initializer=initializer) as pool:
+            # chunksize 1 so a worker only takes a new job once it's done with its current one
+            for spec, result in zip(specs, pool.imap(work, specs, chunksize=1)):
+                finish(spec, result)
+
+        print(f"finished {total} jobs in {time.time() - start:.1f}s{f', {len(failed)} failed' if failed else ''}")
+        return failed
@@ -0,0 +1,182 @@
+import os
+import statistics
+from multiprocessing import Pool
+import numpy as np
+
+
+def complete_batch(model, players, rng=None):
+    # simulates a whole population of players at once instead of calling boss.complete() for every player, from the LootModel of the boss.
+    # Every kill each player that hasn't completed yet rolls every loot table of the boss once, the same model the markov chain uses.
+    # returns an array with the kc at which each player completed
+    rng = np.random.default_rng() if rng is None else rng
+
+    items = len(model.items)
+    kc = np.zeros(players, dtype=np.int64)
+    if not items:
+        return kc
+
+    target = model.targets
+    # cumulative odds of the items we're looking for, items that aren't on a table have 0 odds
+    tables = np.cumsum(model.odds, axis=1)
+
+    loot = np.zeros((players, items), dtype=np.int64)
+    # number of items each player still needs more of
+    missing = np.full(players, items)
+    active = np.arange(players)
+    rounds = 0
+    while active.size:
+        rounds += 1
+        for cumulative in tables:
+            # roll in (0, 1] so an item with 0 odds can never be hit, same as 'roll <= odds' in monster.roll_loot
+            roll = 1 - rng.random(active.size)
+            drop = np.searchsorted(cumulative, roll)
+            hit = drop < items
+            player, item = active[hit], drop[hit]
+            # every player gets at most one drop per table so the indices are unique
+            loot[player, item] += 1
+            missing[player] -= loot[player, item] == target[item]
+
+        # mask out the players that are done
+        done = missing[active] == 0
+        kc[active[done]] = rounds
+        active = active[~done]
+
+    return kc
+
+
+def complete_events(model, players, rng=None):
+    # Same model as complete_batch, but instead of rolling every kill it jumps straight to the next kill that drops something
+    # a player still needs, so the work scales with the amount of drops instead of the kc. With r_t the chance that table t
+    # drops a needed item, a kill drops one with q = 1 - prod(1 - r_t), so the kills until it happens are geometric(q).
+    # On that kill the first table that hits is t with chance prod_{u<t}(1 - r_u) r_t / q, which item it drops goes by
+    # the odds of the needed items on it and the tables after it roll like normal.
+    # returns an array with the kc at which each player completed
+    rng = np.random.default_rng() if rng is None else rng
+
+    items = len(model.items)
+    kc = np.zeros(players, dtype=np.int64)
+    if not items:
+        return kc
+
+    target = model.targets
+    odds = model.odds
+    if((odds.sum(axis=0) <= 0).any()):
+        raise ValueError(f"{model.name} needs items that can't drop")
+    cumulative = np.cumsum(odds, axis=1)
+
+    loot = np.zeros((players, items), dtype=np.int64)
+    active = np.arange(players)
+    total = np.zeros(players, dtype=np.int64)
+    while active.size:
+        needed = loot[active] < target
+        # chance of every table to drop something needed
+        r = needed @ odds.T
+        # a table that always drops something needed has log(0) = -inf, which makes q and hitBy exactly 1 like they should be
+        with np.errstate(divide='ignore'):
+            missLog = np.cumsum(np.log1p(-r), axis=1)
+        q = -np.expm1(missLog[:, -1])
+        total[active] += rng.geometric(q)
+
+        # the first table that hits, from the chance to have hit by table t
+        hitBy = -np.expm1(missLog)
+        first = (hitBy < (rng.random(active.size) * q)[:, None]).sum(axis=1)
+        first = np.minimum(first, odds.shape[0] - 1)
+
+        # the needed item it dropped
+        weights = np.cumsum(needed * odds[first], axis=1)
+        item = (weights < (rng.random(active.size) * weights[:, -1])[:, None]).sum(axis=1)
+        item = np.minimum(item, items - 1)
+        loot[active, item] += 1
+
+        # the tables after it roll unconditionally
+        for table in range(1, odds.shape[0]):
+            rolling = np.flatnonzero(first < table)
+            roll = 1 - rng.random(rolling.size)
+            drop = np.searchsorted(cumulative[table], roll)
+            hit = drop < items
+            loot[active[rolling[hit]], drop[hit]] += 1
+
+        done = (loot[active] >= target).all(axis=1)
+        kc[active[done]] = total[active[done]]
+        active = active[~done]
+
+    return kc
+
+
+def quantile_interval(ordered, q, z):
+    # confidence interval of the q quantile from the order statistics of the sorted sample, the amount of samples
+    # below the quantile is binomial(n, q) so its ranks are n q -/+ z sqrt(n q (1 - q))
+    n = len(ordered)
+    spread = z * np.sqrt(n * q * (1 - q))
+    low = int(np.clip(np.floor(n * q - spread), 0, n - 1))
+    high = int(np.clip(np.ceil(n * q + spread), 0, n - 1))
+    return ordered[int(np.clip(np.ceil(n * q) - 1, 0, n - 1))], ordered[low], ordered[high]
+
+
+def sequential_completion(model, quantiles=(0.5,), precision=0.01, confidence=0.95, batch_size=10000, max_samples=10000000, rng=None, simulator=complete_events):
+    # Simulates players in batches until the confidence intervals of the mean and of every quantile are within precision
+    # (relative to the estimate) or max_samples is reached, so easy bosses stop after a batch or two.
+    # Returns the samples it took, the mean with the half width of its interval, (estimate, low, high) for every quantile
+    # and the simulated completions
+    rng = np.random.default_rng() if rng is None else rng
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+    completions = np.empty(0, dtype=np.int64)
+    size = batch_size
+    while True:
+        completions = np.concatenate((completions, simulator(model, min(size, max_samples - len(completions)), rng)))
+        n = len(completions)
+        mean = completions.mean()
+        error = z * completions.std(ddof=1) / np.sqrt(n) if n > 1 else np.inf
+
+        ordered = np.sort(completions)
+        intervals = {q: quantile_interval(ordered, q, z) for q in quantiles}
+        precise = error <= precision * mean and all((high - low) / 2 <= precision * estimate for estimate, low, high in intervals.values())
+        if(precise or n >= max_samples):
+            break
+        # grow the batches so sorting the sample every batch doesn't add up
+        size = max(batch_size, n // 2)
+
+    return {
+        'samples': n,
+        'precise': bool(precise),
+        'mean': (float(mean), float(error)),
+        'quantiles': {q: tuple(int(value) for value in interval) for q, interval in intervals.items()},
+        'completions': completions,
+    }
+
+
+def completion_histogram(model, players, seed, simulator=complete_events):
+    # how many of the players completed at every kc, the part of parallel_completion that runs in a worker
+    return np.bincount(simulator(model, players, np.random.default_rng(seed)))
+
+
+def parallel_completion(model, samples, workers=None, seed=None, simulator=complete_events):
+    # Splits the players over a process pool. Every worker simulates with its own generator spawned from one SeedSequence
+    # and sends back a histogram, so the result only depends on the seed and the amount of workers, not on the order
+    # in which the workers finish. The workers only get the LootModel of the boss, not the whole monster.
+    # Returns the histogram of the kc at which the players completed
+    workers = workers or os.cpu_count()
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [samples // workers + (i < samples % workers) for i in range(workers)]
+    jobs = [(model, share, child, simulator) for share, child in zip(shares, seeds)]
+    if(workers == 1):
+        histograms = [completion_histogram(*job) for job in jobs]
+    else:
+        with Pool(workers) as pool:
+            histograms = pool.starmap(completion_histogram, jobs)
+
+    histogram = np.zeros(max(len(h) for h in histograms), dtype=np.int64)
+    for h in histograms:
+        histogram[:len(h)] += h
+    return histogram
+
+
+def histogram_stats(histogram):
+    # mean, median, min and max kc of a completion histogram
+    kc = np.arange(len(histogram))
+    players = histogram.sum()
+    mean = (kc * histogram).sum() / players
+    median = int(np.searchsorted(np.cumsum(histogram), players / 2))
+    completed = np.flatnonzero(histogram)
+    return mean, median, int(completed[0]), int(completed[-1])
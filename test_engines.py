@@ -0,0 +1,184 @@
+import numpy as np
+import pytest
+from bosses import chambers_of_xeric, createBoss, sweep
+from markov import PhaseType, StateLayout
+from parallel import ParallelPropagator
+
+# Every engine against the sparse chain of the same boss, they're all exact so they have to agree to rounding.
+# The bosses are small enough to run in a few seconds: single and multiple loot tables, groups of interchangeable
+# items that are a chain (one of each) and that aren't (more than one of each).
+bosses = [
+    ('zulrah', 1),
+    ('hespori', 1),
+    ('commander_zilyana', 2),
+    ('Cerberus + 3 smouldering', 1),
+    ('nex', 2),
+]
+
+
+def build(name, group_size, engine='sparse'):
+    boss = createBoss(name)
+    boss.set_groupsize(group_size)
+    boss.engine = engine
+    boss.convertToMarkovChain()
+    return boss
+
+
+def stats(y):
+    # mean (the chance to not have completed yet summed over kc 0 and on), median and length of a cdf
+    return 1 + np.sum(1 - y), int(np.argmax(y > 0.5)) + 1, len(y)
+
+
+def assert_same_cdf(y, reference, tolerance=1e-10):
+    assert len(y) == len(reference)
+    np.testing.assert_allclose(y, reference, rtol=0, atol=tolerance)
+
+
+@pytest.mark.parametrize('name, group_size', bosses)
+def test_lumped_chain_matches_unlumped(name, group_size):
+    boss = build(name, group_size)
+    model = boss.model()
+    # a row that's different for every item keeps the layout from lumping anything
+    unlumped = StateLayout(np.vstack((model.odds, np.arange(len(model.items)))), model.targets)
+    assert len(unlumped.groups) == len(model.items)
+    assert boss.nStates <= unlumped.nStates
+
+    reference = boss.propagateCdf()
+    boss.transitionMatrices = [boss.contructMatrix(unlumped.nStates, odds, unlumped) for odds in model.odds]
+    y = boss.propagateCdf()
+    assert_same_cdf(y, reference)
+    assert stats(y)[1:] == stats(reference)[1:]
+    assert stats(y)[0] == pytest.approx(stats(reference)[0], rel=1e-10)
+
+
+@pytest.mark.parametrize('name, group_size', bosses)
+def test_matrix_free_matches_sparse(name, group_size):
+    assert_same_cdf(build(name, group_size, 'matrix-free').propagateCdf(), build(name, group_size).propagateCdf())
+
+
+def test_matrix_free_matches_sparse_on_clue_groups():
+    # every group of a clue is a chain, which the operator shifts at once. The real clue chains are too big
+    # to build as matrices, so this uses a few items per rarity
+    boss = createBoss('easy_clues')
+    boss.loot_odds = {"Amulet of magic (t)": 1/360, "Wooden shield (g)": 1/1404, "Black full helm (t)": 1/1404, "Black platebody (t)": 1/1404, "Golden apron": 1/2808, "Red elegant shirt": 1/2808}
+    boss.loot_amount = dict.fromkeys(boss.loot_odds, 1)
+    boss._loot_amount = boss.loot_amount.copy()
+    boss.set_groupsize(1)
+    sparse = boss.constructTransitionMatrices(boss.stateLayout())
+    boss.engine = 'matrix-free'
+    boss.convertToMarkovChain()
+    y = boss.propagateCdf()
+    boss.transitionOperator = None
+    boss.transitionMatrices = sparse
+    assert_same_cdf(y, boss.propagateCdf())
+
+
+@pytest.mark.parametrize('name', ['corporeal_beast', 'mimic', 'chambers_of_xeric', 'nex'])
+def test_analytic_matches_sparse(name):
+    analytic = build(name, 1, 'analytic')
+    assert analytic.couponCollector is not None
+    y = analytic.propagateCdf()
+    reference = build(name, 1).propagateCdf()
+    # the closed form can stop a kc apart from the propagated cdf, it reaches the threshold by a different rounding
+    n = min(len(y), len(reference))
+    assert abs(len(y) - len(reference)) <= 1
+    np.testing.assert_allclose(y[:n], reference[:n], rtol=0, atol=1e-10)
+
+
+@pytest.mark.parametrize('name, group_size', [('zulrah', 1), ('hespori', 1), ('commander_zilyana', 1), ('nex', 2)])
+def test_phase_type_matches_sparse(name, group_size):
+    boss = build(name, group_size)
+    reference = boss.propagateCdf()
+    kc = np.array([1, 2, 10, len(reference) // 3, len(reference) // 2, len(reference)])
+    y, error = PhaseType(boss.absorbingMatrix).evaluate(kc)
+    assert error.max() <= PhaseType.tolerance
+    np.testing.assert_allclose(y, reference[kc - 1], rtol=0, atol=1e-9)
+
+    spectral = build(name, group_size, 'spectral')
+    assert_same_cdf(spectral.propagateCdf(), reference, 1e-9)
+
+
+def test_odds_sweep_matches_sparse():
+    settings = [chambers_of_xeric(team_points=points, personal_points=points) for points in (20000, 31000)]
+    for setting, graph in zip(settings, sweep(settings)):
+        setting.engine = 'sparse'
+        setting.convertToMarkovChain()
+        reference = setting.graphFromCdf(setting.propagateCdf())
+        np.testing.assert_allclose(graph[1], reference[1], rtol=0, atol=1e-8)
+        assert graph[3:5] == reference[3:5]
+        assert graph[5] == pytest.approx(reference[5], rel=1e-10)
+
+
+@pytest.mark.parametrize('name, group_size', [('Cerberus + 3 smouldering', 1), ('hespori', 1)])
+def test_parallel_matches_serial(name, group_size):
+    boss = build(name, group_size)
+    reference = boss.propagateCdf()
+    assert_same_cdf(ParallelPropagator(boss.transitionFactors(), 2).propagateCdf(), reference)
+
+    boss.workers = 2
+    boss.propagationDtype = 'float32'
+    y = boss.propagateCdf()
+    n = min(len(y), len(reference))
+    np.testing.assert_allclose(y[:n], reference[:n], rtol=0, atol=boss.propagationError[0])
+
+
+@pytest.mark.parametrize('name, group_size', bosses)
+def test_quantiles_and_mean_match_the_cdf(name, group_size):
+    boss = build(name, group_size)
+    y = boss.propagateCdf()
+    qs = [0.1, 0.5, 0.9, 0.99]
+    assert boss.quantiles(qs) == [int(np.argmax(y >= q)) + 1 for q in qs]
+    # the cdf stops 1e-5 short of the tail
+    mean, _ = boss.expectedCompletion()
+    assert mean == pytest.approx(stats(y)[0], rel=1e-3)
+
+
+@pytest.mark.parametrize('name', ['zulrah', 'hespori', 'barrows'])
+def test_quantiles_follow_the_group_size(name):
+    # the chain (and the powers of it) of the old group size can't be used to answer queries about the new one
+    boss = createBoss(name)
+    boss.quantile(0.5)
+    boss.set_groupsize(2)
+    fresh = createBoss(name)
+    fresh.set_groupsize(2)
+    assert boss.quantiles([0.1, 0.5, 0.9]) == fresh.quantiles([0.1, 0.5, 0.9])
+
+
+@pytest.mark.parametrize('name', ['zulrah', 'commander_zilyana', 'corporeal_beast'])
+def test_cdf_at_follows_the_group_size(name):
+    # the phase type (or closed form) of the old group size can't be used either
+    boss = createBoss(name)
+    boss.cdfAt([500])
+    boss.set_groupsize(2)
+    fresh = createBoss(name)
+    fresh.set_groupsize(2)
+    np.testing.assert_allclose(boss.cdfAt([100, 500, 2000]), fresh.cdfAt([100, 500, 2000]), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', ['zulrah', 'corporeal_beast', 'barrows'])
+def test_expected_completion_solves_the_boss_chain(name):
+    # on a fresh boss it solves the chain the boss builds (barrows has its own), and it follows the group size
+    boss = createBoss(name)
+    mean, variance = boss.expectedCompletion()
+    built = createBoss(name)
+    built.convertToMarkovChain()
+    assert (mean, variance) == pytest.approx(built.expectedCompletion(), rel=1e-12)
+
+    boss.set_groupsize(2)
+    fresh = createBoss(name)
+    fresh.set_groupsize(2)
+    assert boss.expectedCompletion() == pytest.approx(fresh.expectedCompletion(), rel=1e-12)
+
+
+@pytest.mark.parametrize('name, group_size', [('Cerberus + 3 smouldering', 1), ('commander_zilyana', 2)])
+def test_matrix_free_propagates_in_float32(name, group_size):
+    reference = build(name, group_size).propagateCdf()
+    boss = build(name, group_size, 'matrix-free')
+    boss.propagationDtype = 'float32'
+    y = boss.propagateCdf()
+    # the operator follows the precision, a float32 state stays float32 through a kill
+    state = np.zeros(boss.nStates, dtype='float32')
+    state[0] = 1
+    assert boss.transitionOperator(state).dtype == np.float32
+    n = min(len(y), len(reference))
+    np.testing.assert_allclose(y[:n], reference[:n], rtol=0, atol=boss.propagationError[0])
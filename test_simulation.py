@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from bosses import createBoss
+from simulation import complete_batch, complete_events, parallel_completion
+
+
+def test_parallel_completion_is_reproducible():
+    # the same seed and amount of workers give the same histogram, whichever worker finishes first
+    model = createBoss('zulrah').model()
+    first = parallel_completion(model, 20000, workers=2, seed=7)
+    second = parallel_completion(model, 20000, workers=2, seed=7)
+    assert np.array_equal(first, second)
+    assert first.sum() == 20000
+    assert not np.array_equal(first, parallel_completion(model, 20000, workers=2, seed=8))
+
+
+@pytest.mark.parametrize('simulator', [complete_events, complete_batch])
+@pytest.mark.parametrize('name, group_size', [('hespori', 1), ('Dagannoth Kings', 1), ('zulrah', 2)])
+def test_simulation_matches_the_exact_chain(simulator, name, group_size):
+    # the simulated mean and median against the exact ones, within 4 standard errors
+    boss = createBoss(name)
+    boss.set_groupsize(group_size)
+    players = 50000
+    kc = simulator(boss.model(), players, np.random.default_rng(0))
+
+    mean, variance = boss.expectedCompletion()
+    assert abs(kc.mean() - mean) <= 4 * np.sqrt(variance / players)
+
+    # the share of players done by the exact median is binomial around the exact cdf there
+    median = boss.quantile(0.5)
+    done = boss.cdfAt([median])[0]
+    assert abs((kc <= median).mean() - done) <= 4 * np.sqrt(done * (1 - done) / players)